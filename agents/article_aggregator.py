@@ -1,7 +1,8 @@
 # agents/article_aggregator.py
 
 import logging
-from tools.filters.text_cleaner import clean_text
+from tools.cpu_executor import clean_texts
+from tools.metrics import timed
 
 
 class ArticleAggregator:
@@ -26,24 +27,35 @@ class ArticleAggregator:
         if theme:
             lines.append(f"# {theme}\n")
 
-        # Вставим абзац-вступление (первый параграф первого контента)
+        # Вступление (первый параграф первого контента) и абзацы всех блоков
+        # чистим одной пачкой — в пуле процессов (tools/cpu_executor.py), куски пачки параллельно
+        intro = None
         if sections and sections[0].get("content"):
             intro = sections[0]["content"].strip().split("\n")[0]
-            cleaned_intro = clean_text(intro)
-            lines.append(cleaned_intro + "\n")
 
-        for i, block in enumerate(sections, 1):
+        blocks = []
+        for block in sections:
             headline = block.get("headline", "").strip()
             content = block.get("content", "").strip()
 
             if not headline or not content:
                 continue
 
+            paragraphs = [para.strip() for para in content.split("\n\n")]  # <-- абзацы
+            blocks.append((headline, [para for para in paragraphs if para]))
+
+        batch = ([intro] if intro is not None else []) + [para for _, paras in blocks for para in paras]
+        with timed("clean", paragraphs=len(batch)):
+            cleaned = iter(clean_texts(batch))
+
+        if intro is not None:
+            lines.append(next(cleaned) + "\n")
+
+        for headline, paragraphs in blocks:
             lines.append(f"## {headline}\n")
 
-            paragraphs = content.split("\n\n")  # <-- абзацы
-            for para in paragraphs:
-                cleaned_para = clean_text(para.strip())
+            for _ in paragraphs:
+                cleaned_para = next(cleaned)
                 if cleaned_para:
                     lines.append(cleaned_para + "\n")
 
@@ -1,13 +1,15 @@
 import json
 import os
 import logging
-from langchain.chat_models import ChatOpenAI
 from langchain.prompts import (
     ChatPromptTemplate,
     SystemMessagePromptTemplate,
     HumanMessagePromptTemplate
 )
 from langchain.chains import LLMChain
+from langchain_core.output_parsers import StrOutputParser
+
+from agents.llm_factory import build_chat_llm
 from tools.collectors.fact_collector import FactCollector, fetch_articles_from_xmlriver
 
 
@@ -17,9 +19,11 @@ class ContentGenerator:
     Встраивает релевантные факты, избегает шаблонов и лишнего.
     """
 
+    CONFIG_FILE = "content_config.json"
+
     def __init__(self, config_path=None):
         config_path = config_path or os.path.join(
-            os.path.dirname(os.path.realpath(__file__)), "configs", "content_config.json"
+            os.path.dirname(os.path.realpath(__file__)), "configs", self.CONFIG_FILE
         )
         with open(config_path, "r", encoding="utf-8") as f:
             self.config = json.load(f)
@@ -30,6 +34,9 @@ class ContentGenerator:
         self.top_p = self.config.get("top_p", 1.0)
         self.presence_penalty = self.config.get("presence_penalty", 0.0)
         self.frequency_penalty = self.config.get("frequency_penalty", 0.0)
+        # Генерация текста — сэмплирование (temperature 0.7): кэш вернул бы тот же текст
+        # на каждый повторный запуск, поэтому по умолчанию он выключен
+        self.use_llm_cache = self.config.get("use_llm_cache", False)
 
         # Стиль и настройки генерации
         self.default_length = self.config.get("default_length", 400)
@@ -40,18 +47,22 @@ class ContentGenerator:
         self.citations_style = self.config.get("citations_style", "APA")
         self.use_fact_tool = self.config.get("use_fact_tool", True)
 
+        # Извлечение фактов детерминировано (temperature 0.2) — его ответы кэшируются всегда
         self.fact_collector = FactCollector(model_name=self.model_name)
 
-        self.llm = ChatOpenAI(
+        self.llm = build_chat_llm(
             model_name=self.model_name,
             temperature=self.temperature,
             top_p=self.top_p,
             presence_penalty=self.presence_penalty,
-            frequency_penalty=self.frequency_penalty
+            frequency_penalty=self.frequency_penalty,
+            use_cache=self.use_llm_cache
         )
 
         self.criteria_block = self._build_criteria_block()
         self.chat_prompt = self._build_prompt()
+        self.chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
+        self.stream_chain = self.chat_prompt | self.llm | StrOutputParser()
 
     def _build_criteria_block(self) -> str:
         lines = []
@@ -140,7 +151,20 @@ class ContentGenerator:
         logging.info(f"[ContentGenerator] Генерация текста с заранее отфильтрованными фактами: '{headline}'")
         return self._run_chain(headline, global_theme, example_text, filtered_facts)
 
+    def stream_with_facts(self, headline: str, global_theme: str, example_text: str, filtered_facts: list[str]):
+        """
+        Потоковая версия run_with_facts: генератор фрагментов текста по мере их генерации моделью.
+        """
+        logging.info(f"[ContentGenerator] Потоковая генерация текста: '{headline}'")
+        chain_input = self._build_chain_input(headline, global_theme, example_text, filtered_facts)
+        yield from self.stream_chain.stream(chain_input)
+
+    async def arun_with_facts(self, headline: str, global_theme: str, example_text: str, filtered_facts: list[str]) -> str:
+        """Асинхронная версия run_with_facts (для services/async_pipeline.py)."""
+        logging.info(f"[ContentGenerator] Асинхронная генерация текста: '{headline}'")
+        chain_input = self._build_chain_input(headline, global_theme, example_text, filtered_facts)
+        return await self.stream_chain.ainvoke(chain_input)
+
     def _run_chain(self, headline: str, global_theme: str, example_text: str, facts: list[str]) -> str:
         chain_input = self._build_chain_input(headline, global_theme, example_text, facts)
-        chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
-        return chain.run(chain_input)
+        return self.chain.run(chain_input)
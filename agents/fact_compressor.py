@@ -1,13 +1,20 @@
 # file: agents/fact_compressor.py
 
 import os
+import re
 import json
+import asyncio
 import logging
 
-from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
 from langchain.chains import LLMChain
 
+from agents.llm_factory import build_chat_llm
+from tools.filters.fact_router import route_facts
+
+# Хвост строки подзаголовка из промпта, который модель иногда копирует в ключ ответа
+_CANDIDATES_SUFFIX = re.compile(r"\s*\(кандидаты:[^)]*\)\s*$")
+
 
 class FactFilter:
     """
@@ -15,6 +22,8 @@ class FactFilter:
     фильтрует, группирует по подзаголовкам и переформулирует.
     """
 
+    CONFIG_FILE = "fact_compressor_config.json"
+
     def __init__(self, config_path=None):
         """
         Загружаем настройки (model_name, temperature и т.п.) из JSON-конфига,
@@ -22,34 +31,41 @@ class FactFilter:
         """
         script_dir = os.path.dirname(os.path.realpath(__file__))
         if config_path is None:
-            config_path = os.path.join(script_dir, "configs", "fact_compressor_config.json")
+            config_path = os.path.join(script_dir, "configs", self.CONFIG_FILE)
 
         # Пример содержимого fact_compressor_config.json:
         # {
         #   "model_name": "gpt-4",
-        #   "temperature": 0.2
+        #   "temperature": 0.2,
+        #   "use_llm_cache": true,
+        #   "prefilter_top_k": 8
         # }
         with open(config_path, "r", encoding="utf-8") as f:
             self.config = json.load(f)
 
         self.model_name = self.config.get("model_name", "gpt-4")
         self.temperature = self.config.get("temperature", 0.2)
+        self.use_llm_cache = self.config.get("use_llm_cache", True)
+        # Сколько кандидатов на подзаголовок отбирать локально (BM25) до LLM; 0 — отдавать все факты
+        self.prefilter_top_k = self.config.get("prefilter_top_k", 8)
 
-        self.llm = ChatOpenAI(
+        self.llm = build_chat_llm(
             model_name=self.model_name,
-            temperature=self.temperature
+            temperature=self.temperature,
+            use_cache=self.use_llm_cache
         )
 
         self.system_prompt = """
 Ты — помощник, который умеет фильтровать и сжимать факты.
 Вот твоя задача:
-1) Получить список "сырых фактов" (возможно, пересекающихся) и список подзаголовков.
+1) Получить пронумерованный список "сырых фактов" (возможно, пересекающихся) и список подзаголовков.
+   Если у подзаголовка в скобках указаны номера фактов-кандидатов — бери для него только эти факты.
 2) Распределить эти факты по подзаголовкам (если факт явно не подходит — игнорируй).
 3) Удалить дубли и сомнительные утверждения, переформулировать, чтобы избежать копирования исходных фраз.
 4) Итог: для каждого подзаголовка дай список коротких, чётко сформулированных фактов.
 Не выдумывай новые факты. Не добавляй комментарии.
 Формат ответа:
-{ "подзаголовок1": ["Факт1", "Факт2"], "подзаголовок2": [...] }
+{{ "подзаголовок1": ["Факт1", "Факт2"], "подзаголовок2": [...] }}
 """
 
         self.human_prompt = """
@@ -64,37 +80,79 @@ class FactFilter:
             SystemMessagePromptTemplate.from_template(self.system_prompt),
             HumanMessagePromptTemplate.from_template(self.human_prompt)
         ])
+        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
 
-    def run(self, raw_facts: list[str], headlines: list[str]) -> dict:
+    def run(self, raw_facts: list[str], headlines: list[str], theme: str = "") -> dict:
         """
         :param raw_facts: список строк (фактов), собранных FactCollector'ом
         :param headlines: список подзаголовков (H2)
+        :param theme: общая тема статьи (помогает локальному отбору кандидатов)
         :return: dict, где ключ = подзаголовок, значение = список фактов
         """
         logging.info("[FactFilter] Запуск фильтра и группировки фактов.")
+        response = self.chain.run(self._build_chain_input(raw_facts, headlines, theme)).strip()
+        return self._parse_response(response, headlines)
+
+    async def arun(self, raw_facts: list[str], headlines: list[str], theme: str = "") -> dict:
+        """Асинхронная версия run (для services/async_pipeline.py)."""
+        logging.info("[FactFilter] Асинхронный запуск фильтра и группировки фактов.")
+        # BM25-отбор кандидатов — CPU-работа, уводим её из event loop
+        chain_input = await asyncio.to_thread(self._build_chain_input, raw_facts, headlines, theme)
+        result = await self.chain.ainvoke(chain_input)
+        return self._parse_response(result[self.chain.output_key].strip(), headlines)
+
+    def _build_chain_input(self, raw_facts: list[str], headlines: list[str], theme: str) -> dict:
+        if self.prefilter_top_k:
+            # Распределение делаем локально (BM25), LLM только переписывает и чистит кандидатов
+            routed = route_facts(raw_facts, headlines, top_k=self.prefilter_top_k, theme=theme)
+            facts = list(dict.fromkeys(f for candidates in routed.values() for f in candidates))
+            number = {f: i for i, f in enumerate(facts, 1)}
+            headline_lines = []
+            for h in headlines:
+                ids = ", ".join(str(number[f]) for f in routed.get(h, []))
+                headline_lines.append(f"- {h} (кандидаты: {ids or 'нет'})")
+            logging.info(f"[FactFilter] Отобрано кандидатов: {len(facts)} из {len(raw_facts)}")
+        else:
+            facts = raw_facts
+            headline_lines = [f"- {h}" for h in headlines]
 
         # Собираем все факты в одну строку
-        combined_facts = "\n".join(f"- {f}" for f in raw_facts)
+        combined_facts = "\n".join(f"{i}. {f}" for i, f in enumerate(facts, 1))
         # Собираем подзаголовки
-        combined_headlines = "\n".join(f"- {h}" for h in headlines)
+        combined_headlines = "\n".join(headline_lines)
 
-        chain_input = {
+        return {
             "raw_facts": combined_facts,
             "headlines": combined_headlines
         }
 
-        chain = LLMChain(llm=self.llm, prompt=self.prompt)
-        response = chain.run(chain_input).strip()
+    @staticmethod
+    def _normalize_headline(key: str) -> str:
+        key = _CANDIDATES_SUFFIX.sub("", key.strip().lstrip("-").strip())
+        return " ".join(key.split()).casefold()
 
-        # Предполагается, что ответ будет в формате JSON.
-        # Пробуем распарсить:
+    @classmethod
+    def _parse_response(cls, response: str, headlines: list[str]) -> dict:
+        """
+        Разбирает JSON ответа и приводит ключи к подзаголовкам из запроса:
+        модель может вернуть строку подзаголовка вместе с «(кандидаты: ...)»,
+        маркером списка или в другом регистре. Ключи, которых не было в запросе, отбрасываются.
+        """
         try:
             parsed = json.loads(response)
-            if isinstance(parsed, dict):
-                return parsed
-            else:
-                logging.warning("[FactFilter] Ответ не является словарём JSON.")
-                return {}
         except Exception as e:
             logging.warning(f"[FactFilter] Не удалось распарсить JSON: {e}")
             return {}
+        if not isinstance(parsed, dict):
+            logging.warning("[FactFilter] Ответ не является словарём JSON.")
+            return {}
+
+        by_key = {cls._normalize_headline(h): h for h in headlines}
+        result = {}
+        for key, facts in parsed.items():
+            headline = by_key.get(cls._normalize_headline(str(key)))
+            if headline is None:
+                logging.warning(f"[FactFilter] В ответе неизвестный подзаголовок: «{key}»")
+                continue
+            result.setdefault(headline, []).extend(facts if isinstance(facts, list) else [facts])
+        return result
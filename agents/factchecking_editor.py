@@ -2,13 +2,15 @@ import json
 import os
 import logging
 
-from langchain.chat_models import ChatOpenAI
 from langchain.prompts import (
     ChatPromptTemplate,
     SystemMessagePromptTemplate,
     HumanMessagePromptTemplate
 )
 from langchain.chains import LLMChain
+from langchain_core.output_parsers import StrOutputParser
+
+from agents.llm_factory import build_chat_llm
 
 
 class FactCheckingEditor:
@@ -17,10 +19,12 @@ class FactCheckingEditor:
     Сохраняет нейтральность, стиль и структуру без комментариев или оценочных суждений.
     """
 
+    CONFIG_FILE = "factcheck_config.json"
+
     def __init__(self, config_path=None):
         if config_path is None:
             script_dir = os.path.dirname(os.path.realpath(__file__))
-            config_path = os.path.join(script_dir, "configs", "factcheck_config.json")
+            config_path = os.path.join(script_dir, "configs", self.CONFIG_FILE)
 
         with open(config_path, "r", encoding="utf-8") as f:
             self.config = json.load(f)
@@ -30,17 +34,19 @@ class FactCheckingEditor:
         self.top_p = self.config.get("top_p", 1.0)
         self.presence_penalty = self.config.get("presence_penalty", 0.0)
         self.frequency_penalty = self.config.get("frequency_penalty", 0.0)
+        self.use_llm_cache = self.config.get("use_llm_cache", True)
 
         self.strictness_level = self.config.get("strictness_level", 5)
         self.checklist = self.config.get("checklist", [])
         self.rewrite_uncertain = self.config.get("rewrite_uncertain", True)
 
-        self.llm = ChatOpenAI(
+        self.llm = build_chat_llm(
             model_name=self.model_name,
             temperature=self.temperature,
             top_p=self.top_p,
             presence_penalty=self.presence_penalty,
-            frequency_penalty=self.frequency_penalty
+            frequency_penalty=self.frequency_penalty,
+            use_cache=self.use_llm_cache
         )
 
         checklist_items = self.checklist or [
@@ -83,15 +89,26 @@ class FactCheckingEditor:
             SystemMessagePromptTemplate.from_template(self.system_message_template),
             HumanMessagePromptTemplate.from_template(self.human_message_template)
         ])
+        self.chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
+        self.stream_chain = self.chat_prompt | self.llm | StrOutputParser()
 
-    def run(self, text: str) -> str:
-        logging.info("[FactCheckingEditor] Запуск фактчекинга и редактуры текста.")
-
-        chain_input = {
+    def _build_chain_input(self, text: str) -> dict:
+        return {
             "strictness_level": self.strictness_level,
             "checklist_block": self.checklist_block,
             "text_block": text
         }
 
-        chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
-        return chain.run(chain_input)
+    def run(self, text: str) -> str:
+        logging.info("[FactCheckingEditor] Запуск фактчекинга и редактуры текста.")
+        return self.chain.run(self._build_chain_input(text))
+
+    def stream(self, text: str):
+        """Потоковая версия run: генератор фрагментов отредактированного текста."""
+        logging.info("[FactCheckingEditor] Потоковый фактчекинг текста.")
+        yield from self.stream_chain.stream(self._build_chain_input(text))
+
+    async def arun(self, text: str) -> str:
+        """Асинхронная версия run (для services/async_pipeline.py)."""
+        logging.info("[FactCheckingEditor] Асинхронный фактчекинг текста.")
+        return await self.stream_chain.ainvoke(self._build_chain_input(text))
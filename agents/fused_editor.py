@@ -0,0 +1,138 @@
+import json
+import os
+import logging
+
+from langchain.prompts import (
+    ChatPromptTemplate,
+    SystemMessagePromptTemplate,
+    HumanMessagePromptTemplate
+)
+from langchain.chains import LLMChain
+from langchain_core.output_parsers import StrOutputParser
+
+from agents.llm_factory import build_chat_llm
+
+
+class FusedEditor:
+    """
+    Объединённая редактура за один вызов LLM: фактчекинг по чеклисту из factcheck_config.json
+    и стилистика по правилам из style_config.json.
+    Заменяет цепочку FactCheckingEditor → StyleEditor при editor_mode = "fused".
+    """
+
+    CONFIG_FILE = "fused_editor_config.json"
+    # Правила берутся из конфигов двухэтапных редакторов — при их изменении агент пересоздаётся
+    EXTRA_CONFIG_FILES = ("factcheck_config.json", "style_config.json")
+
+    def __init__(self, config_path=None):
+        script_dir = os.path.dirname(os.path.realpath(__file__))
+        if config_path is None:
+            config_path = os.path.join(script_dir, "configs", self.CONFIG_FILE)
+
+        with open(config_path, "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        with open(os.path.join(script_dir, "configs", "factcheck_config.json"), "r", encoding="utf-8") as f:
+            factcheck_config = json.load(f)
+        with open(os.path.join(script_dir, "configs", "style_config.json"), "r", encoding="utf-8") as f:
+            style_config = json.load(f)
+
+        self.model_name = self.config.get("model_name", "gpt-4")
+        self.temperature = self.config.get("temperature", 0.0)
+        self.top_p = self.config.get("top_p", 1.0)
+        self.presence_penalty = self.config.get("presence_penalty", 0.0)
+        self.frequency_penalty = self.config.get("frequency_penalty", 0.0)
+        self.use_llm_cache = self.config.get("use_llm_cache", True)
+
+        # Фактчекинг
+        self.strictness_level = factcheck_config.get("strictness_level", 5)
+        checklist_items = factcheck_config.get("checklist") or [
+            "Даты и числовые данные",
+            "Термины и определения",
+            "Статистика и факты",
+            "Причинно-следственные связи",
+            "Ссылки на источники"
+        ]
+        self.checklist_block = "\n".join(f"- {item}" for item in checklist_items)
+
+        # Стилистика
+        self.tone = style_config.get("tone", "профессиональный")
+        self.preferred_person = style_config.get("preferred_person", "третье лицо")
+        self.avoid_jargon = style_config.get("avoid_jargon", True)
+        self.use_simplification = style_config.get("use_simplification", True)
+        additional_rules = style_config.get("additional_rules", [])
+        self.additional_rules = "\n".join(additional_rules) if additional_rules else "Нет дополнительных указаний."
+
+        self.llm = build_chat_llm(
+            model_name=self.model_name,
+            temperature=self.temperature,
+            top_p=self.top_p,
+            presence_penalty=self.presence_penalty,
+            frequency_penalty=self.frequency_penalty,
+            use_cache=self.use_llm_cache
+        )
+
+        self.system_message_template = """
+Ты — профессиональный редактор: фактчекер и литературный редактор в одном лице.
+
+🧠 Задача (в один проход):
+1. Проверь текст на фактологические ошибки и перепиши спорные, неподтверждённые или преувеличенные фразы нейтрально.
+2. Улучши стиль: сделай текст плавным, логичным, выразительным и удобным для чтения.
+
+🔍 Строгость проверки: {strictness_level}/10
+
+📋 Проверь по чеклисту:
+{checklist_block}
+
+📌 Стиль:
+- Соблюдай тональность: {tone}
+- Используемое лицо: {preferred_person}
+- Упрощать сложные обороты: {use_simplification}
+- Избегать жаргона и технической избыточности: {avoid_jargon}
+
+📋 Дополнительные указания:
+{additional_rules}
+
+📌 Как работать:
+- Не изменяй смысл и структуру абзацев.
+- Не добавляй пояснений или комментариев, не пиши «всё корректно».
+- Верни только отредактированный текст — без заголовков, сносок и вводных.
+"""
+
+        self.human_message_template = """
+Вот текст для редактирования:
+
+"{text_block}"
+"""
+
+        self.chat_prompt = ChatPromptTemplate.from_messages([
+            SystemMessagePromptTemplate.from_template(self.system_message_template),
+            HumanMessagePromptTemplate.from_template(self.human_message_template)
+        ])
+        self.chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
+        self.stream_chain = self.chat_prompt | self.llm | StrOutputParser()
+
+    def _build_chain_input(self, text: str) -> dict:
+        return {
+            "strictness_level": self.strictness_level,
+            "checklist_block": self.checklist_block,
+            "tone": self.tone,
+            "preferred_person": self.preferred_person,
+            "use_simplification": str(self.use_simplification).lower(),
+            "avoid_jargon": str(self.avoid_jargon).lower(),
+            "additional_rules": self.additional_rules,
+            "text_block": text
+        }
+
+    def run(self, text: str) -> str:
+        logging.info("[FusedEditor] Фактчекинг и стилистика за один вызов.")
+        return self.chain.run(self._build_chain_input(text))
+
+    def stream(self, text: str):
+        """Потоковая версия run: генератор фрагментов отредактированного текста."""
+        logging.info("[FusedEditor] Потоковая объединённая редактура.")
+        yield from self.stream_chain.stream(self._build_chain_input(text))
+
+    async def arun(self, text: str) -> str:
+        """Асинхронная версия run (для services/async_pipeline.py)."""
+        logging.info("[FusedEditor] Асинхронная объединённая редактура.")
+        return await self.stream_chain.ainvoke(self._build_chain_input(text))
@@ -0,0 +1,59 @@
+# agents/llm_factory.py
+
+"""
+Единая точка создания LLM-клиентов для всех агентов.
+Здесь подключается общий кэш ответов (tools/cache/llm_cache.py)
+и общий лимитер запросов к OpenAI (tools/rate_limiter.py),
+а сами клиенты хранятся в реестре ресурсов (tools/resources.py).
+"""
+
+from typing import Callable
+
+from tools import resources
+
+# Подмена клиентов (бенчмарки, отладка без сети): factory(model_name=..., temperature=...)
+_llm_override: Callable | None = None
+
+
+def set_llm_override(factory: Callable | None):
+    """
+    Все следующие build_chat_llm возвращают factory(...) вместо ChatOpenAI; None — вернуть как было.
+    Агенты, уже созданные через agents/registry.py, держат старый клиент — после подмены вызовите registry.reset().
+    """
+    global _llm_override
+    _llm_override = factory
+
+
+def build_chat_llm(model_name: str = "gpt-4", temperature: float = 0.2, top_p: float = 1.0,
+                   presence_penalty: float = 0.0, frequency_penalty: float = 0.0,
+                   use_cache: bool = True):
+    """
+    Клиенты создаются лениво и переиспользуются всеми агентами с теми же параметрами,
+    вместе с их HTTP-пулом соединений.
+
+    :param use_cache: False — всегда запрашивать свежий ответ
+                      (для стадий, где нужны новые сэмплы)
+    """
+    if _llm_override is not None:
+        return _llm_override(model_name=model_name, temperature=temperature, top_p=top_p,
+                             presence_penalty=presence_penalty, frequency_penalty=frequency_penalty,
+                             use_cache=use_cache)
+
+    key = f"llm:{model_name}:{temperature}:{top_p}:{presence_penalty}:{frequency_penalty}:{use_cache}"
+
+    def factory():
+        from agents.rate_limited_llm import RateLimitedChatOpenAI
+        from tools.cache.llm_cache import get_llm_cache
+
+        return RateLimitedChatOpenAI(
+            model_name=model_name,
+            temperature=temperature,
+            top_p=top_p,
+            presence_penalty=presence_penalty,
+            frequency_penalty=frequency_penalty,
+            cache=get_llm_cache() if use_cache else False,
+            max_retries=0,  # повторы делает RateLimitedChatOpenAI с учётом лимитера
+            stream_usage=True  # usage в последнем чанке потока — для метрик токенов
+        )
+
+    return resources.get_or_create(key, factory)
@@ -0,0 +1,115 @@
+# agents/rate_limited_llm.py
+
+"""
+ChatOpenAI, который перед каждым запросом берёт квоту у общего лимитера
+(tools/rate_limiter.py), сам повторяет запросы при 429/5xx и пишет
+токены, время и стоимость каждого вызова в tools/metrics.py.
+Встроенные повторы клиента openai отключаются (max_retries=0), чтобы они
+не обходили лимитер. Ответы из кэша LLM квоту не расходуют: кэш проверяется
+до вызова _generate.
+"""
+
+import time
+import asyncio
+import logging
+
+import openai
+from langchain_openai import ChatOpenAI
+
+from tools import rate_limiter, metrics
+from tools.tokens import count_tokens
+
+# Оценка длины ответа, если max_tokens не задан
+DEFAULT_COMPLETION_TOKENS = 1000
+
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.InternalServerError,
+                    openai.APITimeoutError, openai.APIConnectionError)
+
+
+class RateLimitedChatOpenAI(ChatOpenAI):
+
+    def _estimate_tokens(self, messages) -> int:
+        text = "\n".join(str(message.content) for message in messages)
+        try:
+            prompt_tokens = count_tokens(text, model_name=self.model_name)
+        except Exception:
+            prompt_tokens = len(text) // 3
+        return prompt_tokens + (self.max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+    @staticmethod
+    def _usage(result) -> tuple[int | None, int | None]:
+        usage = (result.llm_output or {}).get("token_usage") or {}
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+    def _account(self, estimate: int, prompt_tokens: int | None, completion_tokens: int | None, started: float):
+        if prompt_tokens is not None or completion_tokens is not None:
+            used = (prompt_tokens or 0) + (completion_tokens or 0)
+            rate_limiter.get_rate_limiter().adjust(used - estimate)
+        metrics.record_llm_call(self.model_name, prompt_tokens, completion_tokens, time.monotonic() - started)
+
+    def _on_error(self, error: Exception, attempt: int) -> float:
+        """Решает, повторять ли запрос; возвращает задержку или пробрасывает ошибку."""
+        if not isinstance(error, RETRYABLE_ERRORS) or attempt + 1 >= rate_limiter.RETRY_ATTEMPTS:
+            raise error
+        delay = rate_limiter.backoff_delay(attempt, error)
+        if isinstance(error, openai.RateLimitError):
+            # 429 — квота исчерпана для всего процесса, а не только для этого потока
+            rate_limiter.get_rate_limiter().pause(delay)
+        logging.warning(f"[RateLimiter] {type(error).__name__}, повтор {attempt + 1} через {delay:.1f} с")
+        return delay
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter = rate_limiter.get_rate_limiter()
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(rate_limiter.RETRY_ATTEMPTS):
+            limiter.acquire(estimate)
+            started = time.monotonic()
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if not isinstance(e, openai.RateLimitError):
+                    time.sleep(delay)
+                continue
+            self._account(estimate, *self._usage(result), started)
+            return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter = rate_limiter.get_rate_limiter()
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(rate_limiter.RETRY_ATTEMPTS):
+            await limiter.aacquire(estimate)
+            started = time.monotonic()
+            try:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if not isinstance(e, openai.RateLimitError):
+                    await asyncio.sleep(delay)
+                continue
+            self._account(estimate, *self._usage(result), started)
+            return result
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        """
+        Повтор возможен только до первого чанка: начатый ответ уже ушёл потребителю.
+        """
+        limiter = rate_limiter.get_rate_limiter()
+        estimate = self._estimate_tokens(messages)
+        for attempt in range(rate_limiter.RETRY_ATTEMPTS):
+            limiter.acquire(estimate)
+            started, first_chunk = time.monotonic(), False
+            usage = {}
+            try:
+                for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    first_chunk = True
+                    usage = getattr(chunk.message, "usage_metadata", None) or usage
+                    yield chunk
+                self._account(estimate, usage.get("input_tokens"), usage.get("output_tokens"), started)
+                return
+            except Exception as e:
+                if first_chunk:
+                    raise
+                delay = self._on_error(e, attempt)
+                if not isinstance(e, openai.RateLimitError):
+                    time.sleep(delay)
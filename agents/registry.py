@@ -0,0 +1,81 @@
+# agents/registry.py
+
+"""
+Пул агентов на процесс: каждый агент (вместе с LLM-клиентом и цепочкой)
+создаётся один раз и переиспользуется между запросами.
+Агент пересоздаётся, только если изменился mtime его JSON-конфига
+(или дополнительных конфигов из EXTRA_CONFIG_FILES).
+"""
+
+import os
+import hashlib
+import logging
+import threading
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs")
+
+_agents: dict[tuple, tuple] = {}
+_lock = threading.Lock()
+
+
+def _config_path(cls, config_path: str | None) -> str | None:
+    if config_path:
+        return config_path
+    config_file = getattr(cls, "CONFIG_FILE", None)
+    return os.path.join(CONFIG_DIR, config_file) if config_file else None
+
+
+def _config_files(cls, path: str) -> list[str]:
+    return [path, *(os.path.join(CONFIG_DIR, name) for name in getattr(cls, "EXTRA_CONFIG_FILES", ()))]
+
+
+def _config_mtime(cls, path: str | None):
+    if not path:
+        return None
+    return tuple(os.path.getmtime(p) for p in _config_files(cls, path))
+
+
+def config_fingerprint(*classes) -> str:
+    """
+    Хэш содержимого конфигов агентов (с EXTRA_CONFIG_FILES): меняется при любой правке
+    промпта или параметров модели. Используется как часть ключей мемоизации результатов.
+    """
+    digest = hashlib.sha256()
+    for cls in classes:
+        digest.update(cls.__name__.encode("utf-8"))
+        path = _config_path(cls, None)
+        for file_path in _config_files(cls, path) if path else []:
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_agent(cls, config_path: str | None = None):
+    """
+    Возвращает общий экземпляр агента класса cls.
+    Агенты без конфига (ArticleAggregator, FactCollector) создаются один раз.
+    """
+    path = _config_path(cls, config_path)
+    mtime = _config_mtime(cls, path)
+    key = (cls, path)
+
+    cached = _agents.get(key)
+    if cached is not None and cached[1] == mtime:
+        return cached[0]
+
+    with _lock:
+        cached = _agents.get(key)
+        if cached is not None and cached[1] == mtime:
+            return cached[0]
+
+        if cached is not None:
+            logging.info(f"[AgentRegistry] Конфиг {os.path.basename(path)} изменён — пересоздаём {cls.__name__}")
+        agent = cls(config_path=path) if path else cls()
+        _agents[key] = (agent, mtime)
+        return agent
+
+
+def reset():
+    """Сбрасывает пул (например, в тестах или после смены ключей API)."""
+    with _lock:
+        _agents.clear()
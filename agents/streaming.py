@@ -0,0 +1,25 @@
+# agents/streaming.py
+
+"""
+Вспомогательные функции для потокового (token-level) вывода агентов.
+"""
+
+from typing import Iterable, Iterator
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+
+def iter_paragraphs(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Собирает поток токенов в абзацы: абзац отдаётся, как только после него
+    пришла пустая строка, последний — по окончании потока.
+    """
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        while PARAGRAPH_SEPARATOR in buffer:
+            paragraph, buffer = buffer.split(PARAGRAPH_SEPARATOR, 1)
+            if paragraph.strip():
+                yield paragraph.strip()
+    if buffer.strip():
+        yield buffer.strip()
@@ -2,13 +2,15 @@ import json
 import os
 import logging
 
-from langchain.chat_models import ChatOpenAI
 from langchain.prompts import (
     ChatPromptTemplate,
     SystemMessagePromptTemplate,
     HumanMessagePromptTemplate
 )
 from langchain.chains import LLMChain
+from langchain_core.output_parsers import StrOutputParser
+
+from agents.llm_factory import build_chat_llm
 
 
 class StyleEditor:
@@ -17,10 +19,12 @@ class StyleEditor:
     без потери смысла и технической точности.
     """
 
+    CONFIG_FILE = "style_config.json"
+
     def __init__(self, config_path=None):
         script_dir = os.path.dirname(os.path.realpath(__file__))
         if config_path is None:
-            config_path = os.path.join(script_dir, "configs", "style_config.json")
+            config_path = os.path.join(script_dir, "configs", self.CONFIG_FILE)
 
         with open(config_path, "r", encoding="utf-8") as f:
             self.config = json.load(f)
@@ -30,6 +34,7 @@ class StyleEditor:
         self.top_p = self.config.get("top_p", 1.0)
         self.presence_penalty = self.config.get("presence_penalty", 0.0)
         self.frequency_penalty = self.config.get("frequency_penalty", 0.0)
+        self.use_llm_cache = self.config.get("use_llm_cache", True)
 
         self.tone = self.config.get("tone", "профессиональный")
         self.preferred_person = self.config.get("preferred_person", "третье лицо")
@@ -37,12 +42,13 @@ class StyleEditor:
         self.use_simplification = self.config.get("use_simplification", True)
         self.additional_rules = self.config.get("additional_rules", [])
 
-        self.llm = ChatOpenAI(
+        self.llm = build_chat_llm(
             model_name=self.model_name,
             temperature=self.temperature,
             top_p=self.top_p,
             presence_penalty=self.presence_penalty,
-            frequency_penalty=self.frequency_penalty
+            frequency_penalty=self.frequency_penalty,
+            use_cache=self.use_llm_cache
         )
 
         self.system_message_template = """
@@ -74,13 +80,13 @@ class StyleEditor:
             SystemMessagePromptTemplate.from_template(self.system_message_template),
             HumanMessagePromptTemplate.from_template(self.human_message_template)
         ])
+        self.chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
+        self.stream_chain = self.chat_prompt | self.llm | StrOutputParser()
 
-    def run(self, text: str) -> str:
-        logging.info("[StyleEditor] Стилистическая обработка текста.")
-
+    def _build_chain_input(self, text: str) -> dict:
         additional_rules = "\n".join(self.additional_rules) if self.additional_rules else "Нет дополнительных указаний."
 
-        chain_input = {
+        return {
             "tone": self.tone,
             "preferred_person": self.preferred_person,
             "use_simplification": str(self.use_simplification).lower(),
@@ -89,5 +95,16 @@ class StyleEditor:
             "original_text": text
         }
 
-        chain = LLMChain(llm=self.llm, prompt=self.chat_prompt)
-        return chain.run(chain_input)
+    def run(self, text: str) -> str:
+        logging.info("[StyleEditor] Стилистическая обработка текста.")
+        return self.chain.run(self._build_chain_input(text))
+
+    def stream(self, text: str):
+        """Потоковая версия run: генератор фрагментов отредактированного текста."""
+        logging.info("[StyleEditor] Потоковая стилистическая обработка текста.")
+        yield from self.stream_chain.stream(self._build_chain_input(text))
+
+    async def arun(self, text: str) -> str:
+        """Асинхронная версия run (для services/async_pipeline.py)."""
+        logging.info("[StyleEditor] Асинхронная стилистическая обработка текста.")
+        return await self.stream_chain.ainvoke(self._build_chain_input(text))
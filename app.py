@@ -1,16 +1,53 @@
 # app.py
 
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, abort, Response, \
+    stream_with_context
+import gc
+import os
+import json
+import uuid
 import logging
+import threading
+from datetime import datetime
 
 from agents.headline_generator import run as parse_theme_input
-from services.generation_pipeline import generate_article
 
 app = Flask(__name__)
 app.secret_key = "SUPER_SECRET_KEY_CHANGE_IT"
 
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
 
+# Каждый открытый поток SSE занимает поток воркера до конца генерации. Сверх этого
+# лимита (на процесс) /jobs/<id>/events отвечает 503, и страница опрашивает статус —
+# остальные потоки воркера остаются обычным запросам (см. gunicorn.conf.py)
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "16"))
+_sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+
+@app.template_filter("datetime")
+def format_datetime(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%d.%m.%Y %H:%M")
+
+
+def warmup():
+    """
+    Заранее импортирует пайплайн и загружает тяжёлые ресурсы (spaCy, User-Agent).
+    Вызывается в мастер-процессе prefork-сервера (см. gunicorn.conf.py) или при
+    PRELOAD_RESOURCES=1, чтобы воркеры получили модель через copy-on-write.
+    """
+    import services.generation_pipeline  # noqa: F401 — регистрирует ресурсы
+    from tools import resources
+
+    resources.preload()
+    # Переносим всё загруженное в «вечное» поколение GC, чтобы сборщик мусора
+    # в воркерах не трогал эти страницы памяти и не ломал copy-on-write
+    gc.freeze()
+    logging.info("[app] Ресурсы предзагружены")
+
+
+if os.getenv("PRELOAD_RESOURCES") == "1":
+    warmup()
+
 
 @app.route("/", methods=["GET"])
 def index():
@@ -32,6 +69,12 @@ def generate_headlines():
 
     session["theme"] = theme
     session["headlines"] = headlines
+    session.setdefault("sid", uuid.uuid4().hex)
+
+    # Пока пользователь правит заголовки, источники по теме уже собираются в фоне
+    from services.prefetch import get_prefetcher
+
+    get_prefetcher().prefetch(theme, session_id=session["sid"])
 
     return redirect(url_for("edit_headlines"))
 
@@ -48,19 +91,114 @@ def finalize_headlines():
     theme = session.get("theme", "Тема не найдена")
     edited_headlines = [h.strip() for h in request.form.getlist("headline") if h.strip()]
     session["headlines"] = edited_headlines
+    session.setdefault("sid", uuid.uuid4().hex)
+
+    # Пайплайн (LangChain, spaCy) импортируется при первом запросе, а не при старте воркера
+    from services.jobs import get_job_manager
+
+    # Генерация идёт в фоне, запрос сразу отдаёт страницу прогресса
+    # В сессии храним только id: сама статья и факты — в services/result_store.py
+    job = get_job_manager().submit(theme, edited_headlines, session_id=session["sid"])
+    session["job_id"] = job.id
+
+    # Страница результата показывает готовые разделы по мере генерации (SSE)
+    return redirect(url_for("result", job_id=job.id))
+
+
+def _get_job(job_id: str) -> dict:
+    # Состояние — из общего хранилища: задачу мог запустить другой воркер gunicorn
+    from services.job_store import get_job
+
+    job = get_job(job_id)
+    if job is None:
+        abort(404)
+    return job
+
 
-    final_article, filtered_facts = generate_article(theme, edited_headlines)
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_progress(job_id):
+    return render_template("progress.html", job=_get_job(job_id))
 
-    session["filtered_facts_by_h2"] = filtered_facts
-    session["final_article"] = final_article
 
-    return redirect(url_for("result"))
+@app.route("/jobs/<job_id>/status", methods=["GET"])
+def job_status(job_id):
+    return jsonify(_get_job(job_id))
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    Server-Sent Events: разделы статьи по порядку по мере готовности,
+    в конце — итоговый markdown.
+    """
+    from services.job_store import iter_events
+
+    _get_job(job_id)
+    if not _sse_slots.acquire(blocking=False):
+        return Response("Слишком много открытых потоков, опрашивайте статус", status=503,
+                        headers={"Retry-After": "5"})
+
+    def stream():
+        for event, data in iter_events(job_id):
+            if event == "ping":
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Слот освобождается, когда сервер закрывает ответ (в том числе при обрыве соединения)
+    response.call_on_close(_sse_slots.release)
+    return response
 
 
 @app.route("/result", methods=["GET"])
 def result():
-    article = session.get("final_article", "Статья не найдена.")
-    return render_template("result.html", article=article)
+    from services.job_store import get_job
+    from services.result_store import get_result
+
+    job_id = request.args.get("job_id") or session.get("job_id")
+    stored = get_result(job_id) if job_id else None
+    if stored:
+        return render_template("result.html", article=stored["article"])
+
+    # Статья ещё генерируется — страница подключится к потоку разделов
+    job = get_job(job_id) if job_id else None
+    if job is not None:
+        return render_template("result.html", article="", job=job)
+    return render_template("result.html", article="Статья не найдена.")
+
+
+@app.route("/articles", methods=["GET"])
+def articles():
+    from services.result_store import list_results
+
+    theme = request.args.get("theme", "").strip() or None
+    mine = request.args.get("mine") == "1"
+    if mine and not session.get("sid"):
+        # Сессия ещё ничего не генерировала; session_id=None в list_results значит «без фильтра»
+        items = []
+    else:
+        items = list_results(theme=theme, session_id=session.get("sid") if mine else None)
+    return render_template("articles.html", articles=items, theme=theme or "", mine=mine)
+
+
+@app.route("/articles/<result_id>", methods=["GET"])
+def article_view(result_id):
+    from services.result_store import get_result
+
+    stored = get_result(result_id)
+    if stored is None:
+        abort(404)
+    return render_template("result.html", article=stored["article"])
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Метрики пайплайна в формате Prometheus (по текущему процессу)."""
+    from tools.metrics import render_prometheus
+
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
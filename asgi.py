@@ -0,0 +1,108 @@
+# asgi.py
+
+"""
+ASGI-точка входа с асинхронным пайплайном (services/async_pipeline.py).
+Работает рядом с Flask-приложением (app.py): тот же кэш и то же хранилище
+результатов, так что готовые статьи видны и на /articles во Flask.
+
+Запуск:
+    uvicorn asgi:app --host 0.0.0.0 --port 8001
+
+API:
+    POST /api/articles               {"theme": ..., "headlines": [...]} или {"input": "Тема: H2; H2"}
+    GET  /api/articles/{id}          статус генерации (+ статья, когда готова)
+    GET  /api/articles/{id}/events   Server-Sent Events: разделы по мере готовности, затем статья
+    GET  /metrics                    метрики в формате Prometheus
+"""
+
+import json
+import logging
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from agents.headline_generator import parse_theme_and_headlines
+from services.async_jobs import create_async_job_manager
+from tools.parsers.async_fetch import make_async_client
+from tools.metrics import render_prometheus
+
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    # Один HTTP-клиент (пул соединений) на всё приложение
+    async with make_async_client() as client:
+        app.state.jobs = create_async_job_manager(client)
+        yield
+        await app.state.jobs.shutdown()
+
+
+def _get_job(request: Request):
+    return request.app.state.jobs.get(request.path_params["job_id"])
+
+
+async def create_article(request: Request):
+    try:
+        payload = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "Ожидается JSON"}, status_code=400)
+
+    if payload.get("input"):
+        theme, headlines = parse_theme_and_headlines(payload["input"])
+    else:
+        theme = (payload.get("theme") or "").strip()
+        headlines = [h.strip() for h in payload.get("headlines") or [] if h.strip()]
+    if not theme or not headlines:
+        return JSONResponse({"error": "Нужны тема и хотя бы один подзаголовок"}, status_code=400)
+
+    job = request.app.state.jobs.submit(theme, headlines)
+    return JSONResponse({
+        "id": job.id,
+        "status_url": f"/api/articles/{job.id}",
+        "events_url": f"/api/articles/{job.id}/events"
+    }, status_code=202)
+
+
+async def article_status(request: Request):
+    job = _get_job(request)
+    if job is None:
+        return JSONResponse({"error": "Задача не найдена"}, status_code=404)
+    data = job.to_dict()
+    if data["status"] == "done":
+        data["article"] = job.article
+    return JSONResponse(data)
+
+
+async def article_events(request: Request):
+    job = _get_job(request)
+    if job is None:
+        return JSONResponse({"error": "Задача не найдена"}, status_code=404)
+
+    async def stream():
+        async for event, data in job.aiter_events():
+            if event == "ping":
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+async def metrics(request: Request):
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+app = Starlette(
+    routes=[
+        Route("/api/articles", create_article, methods=["POST"]),
+        Route("/api/articles/{job_id}", article_status, methods=["GET"]),
+        Route("/api/articles/{job_id}/events", article_events, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ],
+    lifespan=lifespan
+)
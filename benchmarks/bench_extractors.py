@@ -0,0 +1,102 @@
+# benchmarks/bench_extractors.py
+
+"""
+Сравнение бэкендов parse_article_content на сохранённых страницах.
+
+Запуск:
+    python -m benchmarks.bench_extractors path/to/pages        # *.html из каталога
+    python -m benchmarks.bench_extractors --from-cache 50      # страницы из кэша (tools/cache/page_cache.py)
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+from tools.parsers.article_parser import PARSER_BACKENDS
+
+
+def load_pages_from_dir(path: str) -> list[str]:
+    pages = []
+    for filename in sorted(glob.glob(os.path.join(path, "*.html"))):
+        with open(filename, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    return pages
+
+
+def load_pages_from_cache(limit: int) -> list[str]:
+    from tools.cache.page_cache import get_page_cache
+
+    store = get_page_cache()
+    keys = [row[0] for row in store._connect().execute(
+        "SELECT key FROM entries ORDER BY accessed_at DESC LIMIT ?", (limit,)
+    )]
+    return [entry.value["html"] for entry in map(store.lookup, keys) if entry is not None]
+
+
+def duplicate_ratio(text: str) -> float:
+    """Доля абзацев, повторяющихся в результате (признак двойного извлечения)."""
+    parts = [p.removeprefix("• ").removeprefix("Цитата: ") for p in text.split("\n\n") if p]
+    return 1 - len(set(parts)) / len(parts) if parts else 0.0
+
+
+def bench_backend(parse, pages: list[str], repeat: int) -> dict:
+    timings = []
+    chars = 0
+    dup = []
+    for html in pages:
+        best = None
+        text = ""
+        for _ in range(repeat):
+            started = time.perf_counter()
+            text = parse(html)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        timings.append(best)
+        chars += len(text)
+        dup.append(duplicate_ratio(text))
+
+    return {
+        "total_ms": sum(timings) * 1000,
+        "median_ms": statistics.median(timings) * 1000,
+        "chars": chars,
+        "dup_ratio": statistics.mean(dup)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages_dir", nargs="?", help="каталог с сохранёнными *.html")
+    parser.add_argument("--from-cache", type=int, default=0, help="взять N последних страниц из кэша страниц")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов на страницу (берётся лучший)")
+    parser.add_argument("--backends", default=",".join(PARSER_BACKENDS), help="список бэкендов через запятую")
+    args = parser.parse_args(argv)
+
+    if args.from_cache:
+        pages = load_pages_from_cache(args.from_cache)
+    elif args.pages_dir:
+        pages = load_pages_from_dir(args.pages_dir)
+    else:
+        parser.error("укажите каталог со страницами или --from-cache N")
+
+    if not pages:
+        print("Нет страниц для замера.")
+        return 1
+
+    print(f"Страниц: {len(pages)}, повторов: {args.repeat}\n")
+    print(f"{'backend':<12} {'total, ms':>10} {'median, ms':>11} {'chars':>10} {'dups':>6}")
+    for name in args.backends.split(","):
+        try:
+            result = bench_backend(PARSER_BACKENDS[name], pages, args.repeat)
+        except Exception as e:
+            print(f"{name:<12} ошибка: {e}")
+            continue
+        print(f"{name:<12} {result['total_ms']:>10.1f} {result['median_ms']:>11.2f} "
+              f"{result['chars']:>10} {result['dup_ratio']:>6.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+# benchmarks/bench_pipeline.py
+
+"""
+Офлайн-бенчмарк пайплайна: LLM, XMLriver и сайты заменены локальными заглушками
+(benchmarks/fake_llm.py, benchmarks/fake_web.py), так что замеры ничего не стоят
+и не зависят от сети.
+
+Замеряются parse_article_content (в том числе из потоков и через пул процессов), загрузка страниц,
+clean_text / clean_texts (в том числе пачки размера статьи через пул процессов),
+collect_raw_facts, ArticleAggregator.run и generate_article целиком —
+на нескольких размерах корпуса и уровнях параллельности. Результат пишется в JSON;
+с --baseline сравнивается с прошлым прогоном, и регрессии дают код выхода 1.
+
+Запуск:
+    python -m benchmarks.bench_pipeline -o bench.json
+    python -m benchmarks.bench_pipeline --pages-dir path/to/pages --sizes 3,6,12 --concurrency 1,4
+    python -m benchmarks.bench_pipeline --quick --baseline bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+
+from benchmarks.bench_extractors import load_pages_from_dir
+from benchmarks.fake_web import FakeWeb, synthetic_corpus
+
+
+def measure(fn, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {"best_s": round(min(timings), 4), "median_s": round(statistics.median(timings), 4)}
+
+
+class Bench:
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results = []
+
+    def run(self, name: str, fn, repeat: int | None = None, **params):
+        try:
+            result = measure(fn, repeat or self.repeat)
+        except Exception as e:
+            result = {"error": f"{type(e).__name__}: {e}"}
+        record = {"bench": name, **params, **result}
+        self.results.append(record)
+        shown = ", ".join(f"{k}={v}" for k, v in params.items())
+        timing = f"{result['median_s'] * 1000:.1f} ms" if "median_s" in result else result["error"]
+        print(f"{name:<18} {shown:<36} {timing}")
+        return record
+
+
+def bench_parse(bench: Bench, pages: list[str]):
+    from tools.parsers.article_parser import parse_article_content
+
+    for backend in ("lxml", "bs4"):
+        bench.run("parse", lambda: [parse_article_content(html, backend=backend) for html in pages],
+                  backend=backend, pages=len(pages))
+
+
+def bench_parse_parallel(bench: Bench, pages: list[str], concurrency: list[int], rounds: int = 5):
+    """Разбор из нескольких потоков: на месте (CPU_WORKERS=0) и через пул процессов."""
+    from concurrent.futures import ThreadPoolExecutor
+    from tools import cpu_executor
+    from tools.parsers.article_parser import parse_article_content
+
+    batch = pages * rounds
+    cpu_executor.parse_html(pages[0])  # запуск пула не входит в замер
+    for workers in concurrency:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            bench.run("parse_threads", lambda: list(executor.map(parse_article_content, batch)),
+                      pages=len(batch), concurrency=workers)
+            bench.run("parse_cpu_pool", lambda: list(executor.map(cpu_executor.parse_html, batch)),
+                      pages=len(batch), concurrency=workers, cpu_workers=cpu_executor.CPU_WORKERS)
+
+
+def bench_fetch(bench: Bench, web: FakeWeb, concurrency: list[int]):
+    from tools.parsers.article_parser import fetch_text_batch
+
+    for workers in concurrency:
+        # Каждый повтор — новые URL, чтобы мерить загрузку, а не кэш страниц
+        tags = iter(range(10 ** 6))
+        bench.run("fetch", lambda: fetch_text_batch(web.page_urls(f"fetch-{workers}-{next(tags)}"), max_workers=workers),
+                  pages=len(web.pages), concurrency=workers)
+
+
+def bench_clean(bench: Bench, paragraphs: list[str], sizes: list[int]):
+    from tools.filters.text_cleaner import clean_text, clean_texts
+
+    for size in sizes:
+        batch = paragraphs[:size]
+        bench.run("clean_text", lambda: [clean_text(text) for text in batch], paragraphs=len(batch))
+        bench.run("clean_texts", lambda: clean_texts(batch), paragraphs=len(batch))
+
+
+def bench_clean_pool(bench: Bench, paragraphs: list[str], sizes: list[int], concurrency: list[int]):
+    """
+    Очистка пачек размера статьи из нескольких потоков (как сборка в параллельных пайплайнах):
+    на месте и через пул процессов — для выбора CLEAN_POOL_MIN_TEXTS.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from tools import cpu_executor
+    from tools.filters import text_cleaner
+
+    for size in sizes:
+        batch = paragraphs[:size]
+        for workers in concurrency:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                bench.run("clean_threads", lambda: list(executor.map(text_cleaner.clean_texts, [batch] * workers)),
+                          paragraphs=len(batch), concurrency=workers)
+                bench.run("clean_cpu_pool", lambda: list(executor.map(cpu_executor.clean_texts, [batch] * workers)),
+                          paragraphs=len(batch), concurrency=workers, cpu_workers=cpu_executor.CPU_WORKERS)
+
+
+def bench_collect(bench: Bench, texts: list[str], sizes: list[int]):
+    from tools.collectors.fact_collector import FactCollector
+
+    collector = FactCollector()
+    for size in sizes:
+        corpus = [texts[i % len(texts)] for i in range(size)]
+        bench.run("collect_raw_facts", lambda: collector.collect_raw_facts(corpus), texts=size)
+
+
+def bench_aggregate(bench: Bench, sizes: list[int], output_words: int):
+    from agents.article_aggregator import ArticleAggregator
+    from benchmarks.fake_llm import fake_answer
+
+    aggregator = ArticleAggregator()
+    for size in sizes:
+        sections = [{"headline": f"Раздел {i}", "content": fake_answer(f"section {i}", output_words)} for i in range(size)]
+        bench.run("aggregate", lambda: aggregator.run(sections, theme="Тема"), sections=size)
+
+
+def bench_generate(bench: Bench, sizes: list[int], concurrency: list[int], repeat: int):
+    from services.generation_pipeline import generate_article
+
+    for size in sizes:
+        headlines = [f"Подзаголовок {i}" for i in range(size)]
+        for workers in concurrency:
+            # Своя тема на каждый прогон — свои URL в выдаче, кэши SERP и страниц не помогают
+            runs = iter(range(10 ** 6))
+            bench.run("generate_article",
+                      lambda: generate_article(f"Тема {size}-{workers}-{next(runs)}", headlines, max_workers=workers),
+                      repeat=repeat, headlines=size, concurrency=workers)
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Строки с регрессиями: медиана хуже базовой больше чем на tolerance."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(record):
+        return tuple(sorted((k, v) for k, v in record.items() if k not in ("best_s", "median_s", "error")))
+
+    before = {key(r): r for r in baseline.get("results", []) if "median_s" in r}
+    regressions = []
+    for record in results:
+        old = before.get(key(record))
+        if old is None or "median_s" not in record or not old["median_s"]:
+            continue
+        change = record["median_s"] / old["median_s"] - 1
+        if change > tolerance:
+            params = ", ".join(f"{k}={v}" for k, v in key(record))
+            regressions.append(f"{params}: {old['median_s']:.4f} → {record['median_s']:.4f} с (+{change:.0%})")
+    return regressions
+
+
+def _ints(value: str) -> list[int]:
+    return [int(x) for x in value.split(",") if x.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default="bench_results.json", help="куда записать результаты (JSON)")
+    parser.add_argument("--pages-dir", help="каталог с сохранёнными *.html (по умолчанию — синтетические страницы)")
+    parser.add_argument("--pages", type=int, default=6, help="сколько синтетических страниц отдавать в выдаче")
+    parser.add_argument("--sizes", default="3,6,12", help="размеры: число H2 / текстов / блоков")
+    parser.add_argument("--concurrency", default="1,4", help="уровни параллельности")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="задержка ответа заглушки LLM, с")
+    parser.add_argument("--llm-words", type=int, default=250, help="длина ответа заглушки LLM, слов")
+    parser.add_argument("--web-latency", type=float, default=0.05, help="задержка ответа локального сервера, с")
+    parser.add_argument("--repeat", type=int, default=3, help="повторов на замер (generate_article — 1)")
+    parser.add_argument("--quick", action="store_true", help="малые размеры и короткие задержки")
+    parser.add_argument("--baseline", help="JSON прошлого прогона для поиска регрессий")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое замедление медианы (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sizes, args.concurrency, args.llm_latency, args.repeat = "3,6", "1,4", 0.05, 2
+
+    logging.basicConfig(level=logging.WARNING)
+    sizes, concurrency = _ints(args.sizes), _ints(args.concurrency)
+
+    pages = load_pages_from_dir(args.pages_dir) if args.pages_dir else synthetic_corpus(args.pages)
+    if not pages:
+        print("Нет страниц для замера.")
+        return 1
+
+    # Кэши (страницы, выдача, ответы LLM) — во временном каталоге, рабочие не трогаем
+    tmp = tempfile.TemporaryDirectory(prefix="bench-")
+    os.environ["CONTENT_FACTORY_CACHE_DIR"] = tmp.name
+    os.environ["RESULT_STORE_PATH"] = os.path.join(tmp.name, "results.sqlite")
+
+    from benchmarks.fake_llm import install_fake_llm, uninstall_fake_llm
+    from tools.parsers.article_parser import parse_article_content
+
+    bench = Bench(args.repeat)
+    with FakeWeb(pages, latency=args.web_latency) as web:
+        os.environ.update(XMLRIVER_URL=web.serp_url, XMLRIVER_USER="bench", XMLRIVER_KEY="bench")
+        install_fake_llm(latency=args.llm_latency, output_words=args.llm_words)
+        try:
+            texts = [parse_article_content(html) for html in pages]
+            paragraphs = [p for text in texts for p in text.split("\n\n") if p.strip()]
+            print(f"Страниц: {len(pages)}, абзацев: {len(paragraphs)}\n")
+
+            bench_parse(bench, pages)
+            bench_parse_parallel(bench, pages, concurrency)
+            bench_fetch(bench, web, concurrency)
+            bench_clean(bench, paragraphs, [size * 10 for size in sizes])
+            # Статья из N разделов — около 4N абзацев плюс вступление
+            bench_clean_pool(bench, paragraphs, [size * 4 + 1 for size in sizes], concurrency)
+            bench_collect(bench, texts, sizes)
+            bench_aggregate(bench, sizes, args.llm_words)
+            bench_generate(bench, sizes, concurrency, repeat=1)
+        finally:
+            uninstall_fake_llm()
+            tmp.cleanup()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "results": bench.results
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты: {args.output}")
+
+    if args.baseline:
+        regressions = compare(bench.results, args.baseline, args.tolerance)
+        for line in regressions:
+            print(f"РЕГРЕССИЯ {line}")
+        if regressions:
+            return 1
+        print("Регрессий нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+# benchmarks/fake_llm.py
+
+"""
+Заглушка ChatOpenAI для офлайн-бенчмарков: отвечает после заданной задержки
+текстом заданной длины, без сети и без затрат.
+
+Подключается через agents/llm_factory.set_llm_override (см. install_fake_llm).
+Ответ на промпт FactFilter — JSON «подзаголовок → факты», на остальные — абзацы текста.
+"""
+
+import re
+import json
+import time
+import random
+import asyncio
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatResult, ChatGeneration, ChatGenerationChunk
+
+from tools import metrics
+
+WORDS = (
+    "система данные процесс результат модель анализ задача решение работа время "
+    "пользователь качество метод подход уровень развитие проект группа показатель "
+    "исследование практика значение структура условие основа изменение часть"
+).split()
+
+PARAGRAPH_WORDS = 60
+
+
+def fake_answer(prompt: str, output_words: int) -> str:
+    """Детерминированный (по промпту) ответ заглушки."""
+    rnd = random.Random(prompt)
+
+    if "Подзаголовки:" in prompt:
+        # FactFilter: JSON с фактами для каждого подзаголовка
+        tail = prompt.split("Подзаголовки:", 1)[1]
+        # Строки подзаголовков берутся как есть, вместе с «(кандидаты: ...)»: так же
+        # ошибается и настоящая модель, а FactFilter должен привести ключи к заголовкам
+        headlines = [line[2:].strip() for line in tail.splitlines() if line.startswith("- ")]
+        facts = {h: [" ".join(rnd.choices(WORDS, k=12)).capitalize() + "." for _ in range(3)]
+                 for h in headlines}
+        return json.dumps(facts, ensure_ascii=False)
+
+    paragraphs = []
+    left = output_words
+    while left > 0:
+        size = min(PARAGRAPH_WORDS, left)
+        paragraphs.append(" ".join(rnd.choices(WORDS, k=size)).capitalize() + ".")
+        left -= size
+    return "\n\n".join(paragraphs)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    :param latency: полное время ответа, с (при потоковой выдаче — до последнего чанка)
+    :param first_token_share: доля latency до первого чанка в потоке
+    :param output_words: длина ответа в словах
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.5
+    first_token_share: float = 0.2
+    output_words: int = 300
+    chunk_words: int = 5
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _text(self, messages) -> str:
+        return fake_answer("\n".join(str(message.content) for message in messages), self.output_words)
+
+    def _record(self, messages, text: str, seconds: float):
+        prompt_words = sum(len(str(message.content).split()) for message in messages)
+        # ~1.5 токена на русское слово
+        metrics.record_llm_call(self.model_name, int(prompt_words * 1.5), int(len(text.split()) * 1.5), seconds)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.monotonic()
+        text = self._text(messages)
+        time.sleep(self.latency)
+        self._record(messages, text, time.monotonic() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.monotonic()
+        text = self._text(messages)
+        await asyncio.sleep(self.latency)
+        self._record(messages, text, time.monotonic() - started)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        started = time.monotonic()
+        text = self._text(messages)
+        # Разбиваем с сохранением пробелов и переводов строк, чтобы абзацы дошли как есть
+        tokens = re.findall(r"\S+\s*", text)
+        chunks = ["".join(tokens[i:i + self.chunk_words]) for i in range(0, len(tokens), self.chunk_words)]
+        time.sleep(self.latency * self.first_token_share)
+        per_chunk = self.latency * (1 - self.first_token_share) / max(len(chunks), 1)
+        for chunk in chunks:
+            if run_manager:
+                run_manager.on_llm_new_token(chunk)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+            time.sleep(per_chunk)
+        self._record(messages, text, time.monotonic() - started)
+
+
+def install_fake_llm(latency: float = 0.5, output_words: int = 300, **kwargs):
+    """
+    Подменяет все LLM-клиенты агентов на FakeChatModel и сбрасывает пул агентов,
+    чтобы уже созданные агенты пересоздались с заглушкой.
+    """
+    from agents import registry
+    from agents.llm_factory import set_llm_override
+
+    def factory(model_name: str = "fake", **_):
+        return FakeChatModel(model_name=model_name, latency=latency, output_words=output_words, **kwargs)
+
+    set_llm_override(factory)
+    registry.reset()
+
+
+def uninstall_fake_llm():
+    from agents import registry
+    from agents.llm_factory import set_llm_override
+
+    set_llm_override(None)
+    registry.reset()
@@ -0,0 +1,133 @@
+# benchmarks/fake_web.py
+
+"""
+Локальная замена интернета для офлайн-бенчмарков: HTTP-сервер в отдельном потоке,
+который отдаёт сохранённые (или синтетические) HTML-страницы и выдачу
+в формате XMLriver. Пайплайн направляется на него через XMLRIVER_URL.
+"""
+
+import time
+import random
+import threading
+from html import escape
+from urllib.parse import urlparse, parse_qs, quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from benchmarks.fake_llm import WORDS
+
+
+def synthetic_page(seed: int, paragraphs: int = 20, shared: list[str] | None = None) -> str:
+    """
+    Страница, похожая на статью: меню, реклама, комментарии вокруг основного текста.
+    shared — абзацы, которые повторяются на нескольких страницах (перепечатки для дедупликации).
+    """
+    rnd = random.Random(seed)
+    body = [" ".join(rnd.choices(WORDS, k=rnd.randint(25, 70))).capitalize() + "." for _ in range(paragraphs)]
+    for text in shared or []:
+        body.insert(rnd.randint(0, len(body)), text)
+
+    nav = "".join(f'<li><a href="/section/{i}">{rnd.choice(WORDS)}</a></li>' for i in range(12))
+    paras = "".join(f"<p>{escape(text)}</p>" for text in body)
+    return (
+        f"<html><head><title>Статья {seed}</title><script>var ads = {seed};</script></head><body>"
+        f'<header><nav><ul>{nav}</ul></nav></header>'
+        f'<div class="banner">Реклама: {rnd.choice(WORDS)}</div>'
+        f"<article><h1>Статья {seed}</h1>{paras}"
+        f"<ul>{''.join(f'<li>{rnd.choice(WORDS)} {rnd.choice(WORDS)}</li>' for _ in range(5))}</ul>"
+        f"<blockquote>{' '.join(rnd.choices(WORDS, k=15))}</blockquote></article>"
+        f'<aside class="comments">{"".join(f"<p>Комментарий {i}</p>" for i in range(5))}</aside>'
+        f"<footer>© {seed}</footer></body></html>"
+    )
+
+
+def synthetic_corpus(count: int, paragraphs: int = 20, duplicate_share: float = 0.2) -> list[str]:
+    rnd = random.Random(count)
+    shared = [" ".join(rnd.choices(WORDS, k=50)).capitalize() + "." for _ in range(max(1, int(paragraphs * duplicate_share)))]
+    return [synthetic_page(seed, paragraphs, shared) for seed in range(count)]
+
+
+class FakeWeb:
+    """
+    GET /page/<n>.html  — страница n из pages (параметры запроса игнорируются)
+    GET /search/xml     — выдача XMLriver со ссылками на все страницы;
+                          к ссылкам добавляется ?q=<запрос>, так что у каждого запроса
+                          свои URL и кэш страниц не пересекается между прогонами
+
+    :param latency: задержка ответа на каждый запрос, с
+    """
+
+    def __init__(self, pages: list[str], latency: float = 0.0):
+        self.pages = pages
+        self.latency = latency
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def serp_url(self) -> str:
+        return f"{self.base_url}/search/xml"
+
+    def page_urls(self, tag: str = "") -> list[str]:
+        suffix = f"?q={quote(tag)}" if tag else ""
+        return [f"{self.base_url}/page/{n}.html{suffix}" for n in range(len(self.pages))]
+
+    def _handler(self):
+        web = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if web.latency:
+                    time.sleep(web.latency)
+                parsed = urlparse(self.path)
+                if parsed.path == "/search/xml":
+                    query = parse_qs(parsed.query).get("query", [""])[0]
+                    items = "".join(
+                        f"<result><title>Статья {n}</title><url>{escape(url)}</url></result>"
+                        for n, url in enumerate(web.page_urls(query))
+                    )
+                    self._send(f'<?xml version="1.0" encoding="utf-8"?><response><results>{items}</results></response>',
+                               "application/xml")
+                    return
+                if parsed.path.startswith("/page/") and parsed.path.endswith(".html"):
+                    try:
+                        self._send(web.pages[int(parsed.path[len("/page/"):-len(".html")])], "text/html")
+                        return
+                    except (ValueError, IndexError):
+                        pass
+                self.send_error(404)
+
+            def _send(self, body: str, content_type: str):
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeWeb":
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-web", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+# Запуск: gunicorn -c gunicorn.conf.py app:app
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+# Поток SSE (/jobs/<id>/events) держит поток воркера всё время генерации статьи,
+# поэтому потоков много: одновременно обслуживается workers × threads запросов,
+# из них потоков SSE — не больше SSE_MAX_STREAMS на воркер (остальные клиенты
+# опрашивают /jobs/<id>/status). Для сотен одновременных зрителей — asgi.py.
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+os.environ.setdefault("SSE_MAX_STREAMS", str(max(1, threads - 8)))
+timeout = 600
+
+# Лимиты OpenAI (OPENAI_RPM/TPM) — на ключ, а лимитер у каждого воркера свой:
+# делим лимиты между воркерами (tools/rate_limiter.py)
+os.environ.setdefault("OPENAI_LIMIT_PROCESSES", str(workers))
+
+# Приложение импортируется в мастер-процессе до fork:
+# модель spaCy и прочие ресурсы загружаются один раз и разделяются воркерами
+preload_app = True
+os.environ.setdefault("PRELOAD_RESOURCES", "1")
+
+# Пул процессов tools/cpu_executor.py: разбор HTML и очистка spaCy уходят из потоков
+# воркера. Каждый процесс пула держит свою модель spaCy (CPU_WORKERS копий на воркер),
+# поэтому по умолчанию — один процесс на воркер; 0 — всё в потоках воркера на модели мастера.
+os.environ.setdefault("CPU_WORKERS", "1")
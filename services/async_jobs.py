@@ -0,0 +1,89 @@
+# services/async_jobs.py
+
+"""
+Фоновые генерации для ASGI-приложения (asgi.py): как services/jobs.py,
+но каждая задача — asyncio.Task в event loop, а не поток.
+Одновременно идёт не больше max_concurrent_async_pipelines генераций
+(pipeline_config.json); остальные ждут в статусе queued.
+"""
+
+import time
+import asyncio
+import logging
+
+import httpx
+
+from services.jobs import Job, JOB_TTL
+from services.async_pipeline import agenerate_article_stream
+from services.generation_pipeline import load_pipeline_config
+from services.result_store import save_result
+from tools.rate_limiter import llm_priority, INTERACTIVE
+
+
+class AsyncJobManager:
+    def __init__(self, client: httpx.AsyncClient, max_concurrent: int = 32):
+        self.client = client
+        self.limit = asyncio.Semaphore(max_concurrent)
+        self.jobs: dict[str, Job] = {}
+        self.tasks: set[asyncio.Task] = set()
+
+    def submit(self, theme: str, headlines: list[str], session_id: str | None = None) -> Job:
+        job = Job(theme, headlines, session_id)
+        self._cleanup()
+        self.jobs[job.id] = job
+        task = asyncio.create_task(self._run(job))
+        # Держим ссылку, иначе задачу может собрать GC
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        logging.info(f"[AsyncJobs] Задача {job.id} поставлена в очередь: «{theme}»")
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    async def _run(self, job: Job):
+        async with self.limit:
+            with job.lock:
+                job.status = "running"
+            try:
+                final_article, filtered_facts = "", {}
+                with llm_priority(INTERACTIVE):
+                    async for event, data in agenerate_article_stream(job.theme, job.headlines,
+                                                                      progress=job.on_progress, client=self.client):
+                        if event == "section":
+                            with job.lock:
+                                job.contents.append(data)
+                        elif event == "article":
+                            final_article, filtered_facts = data["article"], data["facts"]
+
+                await asyncio.to_thread(save_result, job.id, job.theme, job.headlines, final_article,
+                                        filtered_facts, session_id=job.session_id)
+                with job.lock:
+                    job.article = final_article
+                    job.status = "done"
+                    job.stage = "done"
+            except Exception as e:
+                logging.exception(f"[AsyncJobs] Задача {job.id} завершилась с ошибкой")
+                with job.lock:
+                    job.status = "error"
+                    job.error = str(e)
+            finally:
+                with job.lock:
+                    job.finished_at = time.time()
+
+    async def shutdown(self):
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def _cleanup(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished_at and now - job.finished_at > JOB_TTL]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+
+def create_async_job_manager(client: httpx.AsyncClient) -> AsyncJobManager:
+    config = load_pipeline_config()
+    return AsyncJobManager(client, max_concurrent=config.get("max_concurrent_async_pipelines", 32))
@@ -0,0 +1,197 @@
+# services/async_pipeline.py
+
+"""
+Асинхронная версия пайплайна generate_article для ASGI (asgi.py).
+
+Всё ожидание сети — выдача XMLriver, загрузка страниц (httpx) и вызовы LLM
+(LangChain ainvoke) — идёт в одном event loop, поэтому процесс держит десятки
+одновременных генераций без потока на каждую. CPU-работа (разбор HTML,
+collect_raw_facts, сборка статьи со spaCy) и файловый ввод-вывод (SQLite-кэши,
+конфиги) уходят из event loop в потоки через asyncio.to_thread.
+
+Кэши корпуса, фактов и готовых блоков общие с синхронным пайплайном.
+Режим pipelined_sections здесь не используется: блок генерируется целиком.
+"""
+
+import time
+import asyncio
+import logging
+
+import httpx
+
+from agents.content_generator import ContentGenerator
+from agents.article_aggregator import ArticleAggregator
+from agents.fact_compressor import FactFilter
+from agents.registry import get_agent
+from services.generation_pipeline import (load_pipeline_config, notify_progress, build_editors, FactsMemo,
+                                          section_fingerprint, Editors, ProgressCallback,
+                                          AGGREGATION_FAILED, failed_sections)
+from tools.collectors.fact_collector import FactCollector
+from tools.parsers.google_parser import parse_google_results_async
+from tools.parsers.async_fetch import make_async_client, fetch_text_batch_async
+from tools.cache.corpus_cache import acached_corpus
+from tools.cache.section_cache import get_section_cache, section_key
+from tools.metrics import timed, observe_stage
+
+
+async def abuild_fact_corpus(theme: str, client: httpx.AsyncClient) -> list[str]:
+    """Асинхронный build_fact_corpus: выдача → загрузка страниц → сырые факты."""
+    with timed("serp"):
+        results = await parse_google_results_async(theme, client, limit=6)
+    urls = [item["url"] for item in results]
+    with timed("fetch", urls=len(urls)):
+        pages = await fetch_text_batch_async(client, urls)
+    texts = [text for text in pages.values() if text]
+    with timed("facts", sources=len(texts)):
+        return await asyncio.to_thread(get_agent(FactCollector).collect_raw_facts, texts)
+
+
+async def aget_fact_corpus(theme: str, client: httpx.AsyncClient, incremental: bool = True) -> list[str]:
+    if not incremental:
+        return await abuild_fact_corpus(theme, client)
+
+    # Вторая генерация той же темы (в этом или другом процессе) ждёт первую сборку
+    return await acached_corpus(theme, lambda theme: abuild_fact_corpus(theme, client))
+
+
+async def _afilter_facts(raw_facts: list[str], headlines: list[str], theme: str, incremental: bool) -> dict:
+    fact_filter = get_agent(FactFilter)
+    if not incremental:
+        with timed("filter", facts=len(raw_facts), headlines=len(headlines)):
+            return await fact_filter.arun(raw_facts, headlines, theme=theme)
+
+    # FactsMemo читает и пишет SQLite-кэш фактов — в потоке
+    memo = await asyncio.to_thread(FactsMemo, raw_facts, headlines, theme)
+    if memo.missing:
+        with timed("filter", facts=len(raw_facts), headlines=len(memo.missing)):
+            fresh = await fact_filter.arun(raw_facts, memo.missing, theme=theme)
+        await asyncio.to_thread(memo.remember, fresh)
+    return memo.result()
+
+
+async def _agenerate_section(cg: ContentGenerator, editors: Editors,
+                             theme: str, headline: str, facts: list[str],
+                             index: int = 0, progress: ProgressCallback | None = None,
+                             fingerprint: str | None = None) -> dict:
+    """
+    Асинхронный _generate_section; с fingerprint — с мемоизацией блока, как _memoized_section.
+    """
+    store = get_section_cache() if fingerprint else None
+    key = section_key(theme, headline, facts, fingerprint) if fingerprint else None
+    if store is not None:
+        cached = await asyncio.to_thread(store.get, key)
+        if cached is not None:
+            logging.info(f"[AsyncPipeline] Блок '{headline}' взят из кэша")
+            notify_progress(progress, "section", index=index, headline=headline, status="done")
+            return {"headline": headline, "content": cached}
+
+    started = time.monotonic()
+    try:
+        notify_progress(progress, "section", index=index, headline=headline, status="generate")
+        with timed("generate", section=index):
+            text = await cg.arun_with_facts(
+                headline=headline,
+                global_theme=theme,
+                example_text="",
+                filtered_facts=facts
+            )
+        for status, editor in editors:
+            notify_progress(progress, "section", index=index, headline=headline, status=status)
+            with timed(status, section=index):
+                text = await editor.arun(text)
+        notify_progress(progress, "section", index=index, headline=headline, status="done")
+        observe_stage("section", time.monotonic() - started, section=index, headline=headline)
+    except Exception as e:
+        logging.error(f"[AsyncPipeline] Ошибка генерации блока '{headline}': {e}")
+        notify_progress(progress, "section", index=index, headline=headline, status="error", error=str(e))
+        return {"headline": headline, "content": f"Ошибка генерации: {e}", "error": str(e)}
+
+    if store is not None:
+        await asyncio.to_thread(store.set, key, text)
+    return {"headline": headline, "content": text}
+
+
+async def agenerate_article(theme: str, edited_headlines: list[str], max_concurrency: int | None = None,
+                            progress: ProgressCallback | None = None,
+                            client: httpx.AsyncClient | None = None) -> tuple[str, dict]:
+    """Асинхронный generate_article: возвращает (итоговый markdown, факты по H2)."""
+    final_article, filtered_facts_dict = "", {}
+    async for event, data in agenerate_article_stream(theme, edited_headlines, max_concurrency, progress, client):
+        if event == "article":
+            final_article, filtered_facts_dict = data["article"], data["facts"]
+    return final_article, filtered_facts_dict
+
+
+async def agenerate_article_stream(theme: str, edited_headlines: list[str], max_concurrency: int | None = None,
+                                   progress: ProgressCallback | None = None,
+                                   client: httpx.AsyncClient | None = None):
+    """
+    Асинхронный generate_article_stream: те же события ("section", ...) по порядку
+    и в конце ("article", {"article", "facts"}).
+
+    :param client: общий httpx.AsyncClient приложения; без него создаётся временный
+    """
+    own_client = client is None
+    client = client or make_async_client()
+    try:
+        async for item in _agenerate_article_stream(theme, edited_headlines, max_concurrency, progress, client):
+            yield item
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+async def _agenerate_article_stream(theme, edited_headlines, max_concurrency, progress, client):
+    logging.info("[AsyncPipeline] Запуск генерации статьи")
+    started = time.monotonic()
+    config = await asyncio.to_thread(load_pipeline_config)
+    incremental = config.get("incremental", True)
+
+    # 1. Сырые факты по теме
+    notify_progress(progress, "stage", stage="sources")
+    raw_facts = await aget_fact_corpus(theme, client, incremental)
+
+    # 2. Факты по заголовкам
+    notify_progress(progress, "stage", stage="filter")
+    filtered_facts_dict = await _afilter_facts(raw_facts, edited_headlines, theme, incremental)
+
+    # 3. Блоки — конкурентно, не больше max_concurrency одновременно, отдаются по порядку
+    cg = get_agent(ContentGenerator)
+    editors = build_editors(config)
+    # config_fingerprint читает файлы конфигов агентов
+    fingerprint = await asyncio.to_thread(section_fingerprint, editors, "_generate_section") if incremental else None
+    max_concurrency = max(1, max_concurrency or config.get("section_concurrency", 4))
+    limit = asyncio.Semaphore(max_concurrency)
+    notify_progress(progress, "stage", stage="sections")
+
+    async def run_section(index: int, headline: str) -> dict:
+        async with limit:
+            return await _agenerate_section(cg, editors, theme, headline, filtered_facts_dict.get(headline, []),
+                                            index, progress, fingerprint)
+
+    sections_started = time.monotonic()
+    tasks = [asyncio.create_task(run_section(index, headline)) for index, headline in enumerate(edited_headlines)]
+    content_list = []
+    try:
+        for index, task in enumerate(tasks):
+            section = await task
+            content_list.append(section)
+            yield "section", {"index": index, **section}
+    finally:
+        for task in tasks:
+            task.cancel()
+    observe_stage("sections", time.monotonic() - sections_started, sections=len(edited_headlines), workers=max_concurrency)
+
+    # 4. Финальная сборка (spaCy) — в потоке
+    notify_progress(progress, "stage", stage="aggregate")
+    aggregator = get_agent(ArticleAggregator)
+    try:
+        with timed("aggregate"):
+            final_article = await asyncio.to_thread(aggregator.run, content_list, theme)
+    except Exception as e:
+        logging.error(f"[AsyncPipeline] Ошибка при сборке статьи: {e}")
+        final_article = AGGREGATION_FAILED
+
+    observe_stage("article", time.monotonic() - started, theme=theme, sections=len(edited_headlines))
+    yield "article", {"article": final_article, "facts": filtered_facts_dict,
+                      "failed_sections": failed_sections(content_list)}
@@ -0,0 +1,240 @@
+# services/batch_runner.py
+
+"""
+Пакетная генерация статей из файла.
+
+Вход — JSONL или CSV, по одной статье на строку в формате
+"Тема: H2; H2; H2" (как в parse_theme_and_headlines):
+    JSONL: "строка" или {"id": ..., "input": "Тема: H2; H2"} или {"id": ..., "theme": ..., "headlines": [...]}
+    CSV:   первая колонка — строка ввода (необязательная вторая — id)
+
+Результаты дописываются в выходной JSONL по мере готовности; он же служит чекпойнтом:
+при повторном запуске уже готовые id пропускаются.
+
+Запуск:
+    python -m services.batch_runner themes.jsonl -o articles.jsonl --concurrency 2 --starts-per-minute 6
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from agents.headline_generator import parse_theme_and_headlines
+from services.generation_pipeline import generate_article_stream, load_pipeline_config, AGGREGATION_FAILED
+from tools.rate_limiter import llm_priority, BATCH
+
+# Пауза перед повтором упавшей статьи, сек (растёт вдвое с каждой попыткой)
+RETRY_BASE_DELAY = 10.0
+RETRY_MAX_DELAY = 120.0
+
+
+def _item_id(raw: str) -> str:
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_raw_items(path: str):
+    """(номер строки, задание) — задания могут быть без заголовков, их отсеивает read_items."""
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for line_no, row in enumerate(csv.reader(f), 1):
+                if not row or not row[0].strip():
+                    continue
+                raw = row[0].strip()
+                theme, headlines = parse_theme_and_headlines(raw)
+                item_id = row[1].strip() if len(row) > 1 and row[1].strip() else _item_id(raw)
+                yield line_no, {"id": item_id, "theme": theme, "headlines": headlines}
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                data = line  # допускаем обычные текстовые строки
+
+            if isinstance(data, str):
+                theme, headlines = parse_theme_and_headlines(data)
+                yield line_no, {"id": _item_id(data), "theme": theme, "headlines": headlines}
+            elif isinstance(data, dict) and data.get("input"):
+                theme, headlines = parse_theme_and_headlines(data["input"])
+                yield line_no, {"id": str(data.get("id") or _item_id(data["input"])), "theme": theme,
+                                "headlines": headlines}
+            elif isinstance(data, dict) and data.get("theme"):
+                headlines = list(data.get("headlines") or [])
+                raw = f"{data['theme']}: {'; '.join(headlines)}"
+                yield line_no, {"id": str(data.get("id") or _item_id(raw)), "theme": data["theme"],
+                                "headlines": headlines}
+            else:
+                logging.warning(f"[BatchRunner] Строка {line_no}: не удалось разобрать задание")
+
+
+def read_items(path: str):
+    """
+    Генератор заданий {"id", "theme", "headlines"} из JSONL или CSV.
+    Задания без заголовков пропускаются: из них получилась бы пустая «статья».
+    """
+    for line_no, item in _read_raw_items(path):
+        headlines = [h.strip() for h in item["headlines"] if h and h.strip()]
+        if not headlines:
+            logging.warning(f"[BatchRunner] Строка {line_no}: у темы «{item['theme']}» нет заголовков — пропущена")
+            continue
+        item["headlines"] = headlines
+        yield item
+
+
+def _generate(item: dict, max_workers: int | None) -> tuple[str, dict]:
+    """
+    generate_article, но статья с упавшими блоками или несобранная считается ошибкой:
+    пайплайн в таких случаях не бросает исключение, а подставляет текст ошибки.
+    """
+    article, facts, failed = "", {}, []
+    for event, data in generate_article_stream(item["theme"], item["headlines"], max_workers=max_workers):
+        if event == "article":
+            article, facts, failed = data["article"], data["facts"], data["failed_sections"]
+    if failed:
+        raise RuntimeError(f"ошибка генерации блоков: {', '.join(item['headlines'][i] for i in failed)}")
+    if article == AGGREGATION_FAILED:
+        raise RuntimeError("не удалось собрать статью")
+    return article, facts
+
+
+def read_checkpoint(path: str) -> set[str]:
+    """id успешно сгенерированных статей из уже записанного выходного файла."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # недописанная строка после падения
+            if record.get("status") == "done":
+                done.add(record["id"])
+    return done
+
+
+class StartLimiter:
+    """Не чаще starts_per_minute запусков пайплайна в минуту (равномерно)."""
+
+    def __init__(self, starts_per_minute: float | None):
+        self.interval = 60.0 / starts_per_minute if starts_per_minute else 0.0
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = max(0.0, self.next_start - now)
+            self.next_start = max(now, self.next_start) + self.interval
+        if delay:
+            time.sleep(delay)
+
+
+class BatchRunner:
+    def __init__(self, output_path: str, concurrency: int = 2, starts_per_minute: float | None = None,
+                 section_concurrency: int | None = None, retries: int = 1, store: bool = False):
+        self.output_path = output_path
+        self.concurrency = concurrency
+        self.limiter = StartLimiter(starts_per_minute)
+        self.section_concurrency = section_concurrency
+        self.retries = retries
+        self.store = store
+        self.write_lock = threading.Lock()
+        self.stats = {"done": 0, "error": 0, "skipped": 0}
+
+    def _write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.stats[record["status"]] += 1
+
+    def _process(self, item: dict):
+        record = {"id": item["id"], "theme": item["theme"], "headlines": item["headlines"]}
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+            self.limiter.wait()
+            started = time.monotonic()
+            try:
+                # Пакетные вызовы LLM уступают очередь интерактивным задачам из веба
+                with llm_priority(BATCH):
+                    article, facts = _generate(item, self.section_concurrency)
+                record.pop("error", None)
+                record.update(status="done", article=article, elapsed=round(time.monotonic() - started, 1))
+                if self.store:
+                    from services.result_store import save_result
+                    save_result(item["id"], item["theme"], item["headlines"], article, facts)
+                break
+            except Exception as e:
+                logging.warning(f"[BatchRunner] «{item['theme']}», попытка {attempt + 1}: {e}")
+                record.update(status="error", error=str(e), elapsed=round(time.monotonic() - started, 1))
+        self._write(record)
+        logging.info(f"[BatchRunner] {record['status']}: «{item['theme']}» ({record['elapsed']} с) — {self.stats}")
+
+    def run(self, items) -> dict:
+        done_ids = read_checkpoint(self.output_path)
+        if done_ids:
+            logging.info(f"[BatchRunner] Чекпойнт: уже готово {len(done_ids)} статей")
+
+        # Держим в очереди не больше 2×concurrency заданий, чтобы не читать весь файл в память
+        max_in_flight = self.concurrency * 2
+        in_flight = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            try:
+                for item in items:
+                    if item["id"] in done_ids:
+                        self.stats["skipped"] += 1
+                        continue
+                    if len(in_flight) >= max_in_flight:
+                        _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    in_flight.add(executor.submit(self._process, item))
+                wait(in_flight)
+            except KeyboardInterrupt:
+                logging.warning("[BatchRunner] Остановка: ждём завершения уже запущенных статей")
+                for future in in_flight:
+                    future.cancel()
+                raise
+
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL или CSV с заданиями")
+    parser.add_argument("-o", "--output", required=True, help="выходной JSONL (он же чекпойнт)")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="сколько статей генерировать одновременно (по умолчанию max_concurrent_pipelines)")
+    parser.add_argument("--section-concurrency", type=int, default=None, help="параллельных H2 внутри статьи")
+    parser.add_argument("--starts-per-minute", type=float, default=None, help="лимит запусков пайплайна в минуту")
+    parser.add_argument("--retries", type=int, default=1, help="повторов при ошибке пайплайна")
+    parser.add_argument("--store", action="store_true", help="сохранять статьи и в services/result_store.py")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s: %(message)s')
+
+    concurrency = args.concurrency or load_pipeline_config().get("max_concurrent_pipelines", 2)
+    runner = BatchRunner(args.output, concurrency=concurrency, starts_per_minute=args.starts_per_minute,
+                         section_concurrency=args.section_concurrency, retries=args.retries, store=args.store)
+    stats = runner.run(read_items(args.input))
+    logging.info(f"[BatchRunner] Готово: {stats}")
+    return 0 if not stats["error"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,58 +1,311 @@
 # services/generation_pipeline.py
 
+import os
+import json
+import time
 import logging
+import contextvars
+import functools
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
 
 from agents.content_generator import ContentGenerator
 from agents.factchecking_editor import FactCheckingEditor
 from agents.style_editor import StyleEditor
+from agents.fused_editor import FusedEditor
 from agents.article_aggregator import ArticleAggregator
 from agents.fact_compressor import FactFilter
+from agents.registry import get_agent, config_fingerprint
+from agents.streaming import iter_paragraphs
+from tools.metrics import timed, observe_stage
+from tools.cache.corpus_cache import cached_corpus
+from tools.cache.section_cache import get_section_cache, corpus_digest, facts_key, section_key
 from tools.collectors.fact_collector import fetch_articles_from_xmlriver, FactCollector
 
 
-def generate_article(theme: str, edited_headlines: list[str]) -> str:
-    logging.info("[Pipeline] Запуск генерации статьи")
+def load_pipeline_config(config_path=None) -> dict:
+    if config_path is None:
+        script_dir = os.path.dirname(os.path.realpath(__file__))
+        config_path = os.path.join(script_dir, "configs", "pipeline_config.json")
 
-    # 1. Получаем статьи и сырые факты
-    articles = fetch_articles_from_xmlriver(theme, limit=6)
-    collector = FactCollector()
-    raw_facts = collector.collect_raw_facts(articles)
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
 
-    # 2. Фильтруем и распределяем факты по заголовкам
-    fact_filter = FactFilter()
-    filtered_facts_dict = fact_filter.run(raw_facts, edited_headlines)
 
-    # 3. Инициализация агентов
-    cg = ContentGenerator()
-    fce = FactCheckingEditor()
-    se = StyleEditor()
+# Текст статьи, если ArticleAggregator упал
+AGGREGATION_FAILED = "Не удалось собрать статью."
 
-    content_list = []
 
-    # 4. Генерация контента для каждого заголовка
-    for headline in edited_headlines:
-        facts = filtered_facts_dict.get(headline, [])
+def failed_sections(sections: list[dict]) -> list[int]:
+    """Индексы блоков, вместо текста которых — сообщение об ошибке генерации."""
+    return [index for index, section in enumerate(sections) if section.get("error")]
+
+
+# Колбэк прогресса: progress(event, data), где event — "stage" или "section"
+ProgressCallback = Callable[[str, dict], None]
+
+
+def notify_progress(progress: ProgressCallback | None, event: str, **data):
+    if progress is None:
+        return
+    try:
+        progress(event, data)
+    except Exception as e:
+        logging.warning(f"[Pipeline] Ошибка в обработчике прогресса: {e}")
+
+
+# Цепочка редакторов блока: [(статус для прогресса, агент с методом run)]
+Editors = list[tuple[str, object]]
+
 
-        try:
-            raw = cg.run_with_facts(
+def build_editors(config: dict) -> Editors:
+    """
+    editor_mode = "two_stage" (по умолчанию) — FactCheckingEditor → StyleEditor,
+    editor_mode = "fused" — один вызов FusedEditor с правилами обоих редакторов.
+    """
+    if config.get("editor_mode") == "fused":
+        return [("edit", get_agent(FusedEditor))]
+    return [("factcheck", get_agent(FactCheckingEditor)), ("style", get_agent(StyleEditor))]
+
+
+def _generate_section(cg: ContentGenerator, editors: Editors,
+                      theme: str, headline: str, facts: list[str],
+                      index: int = 0, progress: ProgressCallback | None = None) -> dict:
+    """
+    Полная цепочка для одного H2: генерация → фактчекинг → стилистика.
+    Ошибка не пробрасывается наружу, а превращается в текст блока.
+    """
+    started = time.monotonic()
+    try:
+        notify_progress(progress, "section", index=index, headline=headline, status="generate")
+        with timed("generate", section=index):
+            text = cg.run_with_facts(
                 headline=headline,
                 global_theme=theme,
                 example_text="",
                 filtered_facts=facts
             )
-            checked = fce.run(raw)
-            polished = se.run(checked)
-            content_list.append({"headline": headline, "content": polished})
-        except Exception as e:
-            logging.error(f"[Pipeline] Ошибка генерации блока '{headline}': {e}")
-            content_list.append({"headline": headline, "content": f"Ошибка генерации: {e}"})
+        for status, editor in editors:
+            notify_progress(progress, "section", index=index, headline=headline, status=status)
+            with timed(status, section=index):
+                text = editor.run(text)
+        notify_progress(progress, "section", index=index, headline=headline, status="done")
+        observe_stage("section", time.monotonic() - started, section=index, headline=headline)
+        logging.info(f"[Pipeline] Блок '{headline}' готов за {time.monotonic() - started:.1f} с "
+                     f"(редакторы: {' → '.join(status for status, _ in editors)})")
+        return {"headline": headline, "content": text}
+    except Exception as e:
+        logging.error(f"[Pipeline] Ошибка генерации блока '{headline}': {e}")
+        notify_progress(progress, "section", index=index, headline=headline, status="error", error=str(e))
+        return {"headline": headline, "content": f"Ошибка генерации: {e}", "error": str(e)}
+
+
+def _edit_paragraph(editors: Editors, paragraph: str) -> str:
+    for status, editor in editors:
+        with timed(status, log=False):
+            paragraph = editor.run(paragraph)
+    return paragraph.strip()
+
+
+def _generate_section_pipelined(cg: ContentGenerator, editors: Editors,
+                                theme: str, headline: str, facts: list[str],
+                                index: int = 0, progress: ProgressCallback | None = None,
+                                editor_workers: int = 3) -> dict:
+    """
+    Конвейерный вариант _generate_section: текст генерируется потоково, и каждый
+    готовый абзац сразу уходит на редактуру, пока модель пишет следующие.
+    Редакторы работают поабзацно, поэтому режим включается отдельно (pipelined_sections).
+    """
+    started = time.monotonic()
+    try:
+        notify_progress(progress, "section", index=index, headline=headline, status="generate")
+        with ThreadPoolExecutor(max_workers=editor_workers, thread_name_prefix="paragraph") as executor:
+            with timed("generate", section=index):
+                futures = [
+                    executor.submit(contextvars.copy_context().run, _edit_paragraph, editors, paragraph)
+                    for paragraph in iter_paragraphs(cg.stream_with_facts(
+                        headline=headline,
+                        global_theme=theme,
+                        example_text="",
+                        filtered_facts=facts
+                    ))
+                ]
+            # Генерация закончилась — дожидаемся редактуры оставшихся абзацев
+            notify_progress(progress, "section", index=index, headline=headline, status=editors[-1][0])
+            polished = "\n\n".join(future.result() for future in futures)
+        notify_progress(progress, "section", index=index, headline=headline, status="done")
+        observe_stage("section", time.monotonic() - started, section=index, headline=headline)
+        return {"headline": headline, "content": polished}
+    except Exception as e:
+        logging.error(f"[Pipeline] Ошибка генерации блока '{headline}': {e}")
+        notify_progress(progress, "section", index=index, headline=headline, status="error", error=str(e))
+        return {"headline": headline, "content": f"Ошибка генерации: {e}", "error": str(e)}
+
+
+def _memoized_section(runner, fingerprint: str, cg: ContentGenerator, editors: Editors,
+                      theme: str, headline: str, facts: list[str],
+                      index: int = 0, progress: ProgressCallback | None = None) -> dict:
+    """
+    Обёртка над runner: блок с теми же темой, H2, фактами и конфигами агентов
+    берётся из tools/cache/section_cache.py без вызовов LLM. Блоки с ошибкой не запоминаются.
+    """
+    store = get_section_cache()
+    key = section_key(theme, headline, facts, fingerprint)
+    cached = store.get(key)
+    if cached is not None:
+        logging.info(f"[Pipeline] Блок '{headline}' взят из кэша")
+        notify_progress(progress, "section", index=index, headline=headline, status="done")
+        return {"headline": headline, "content": cached}
+
+    section = runner(cg, editors, theme, headline, facts, index, progress)
+    if "error" not in section:
+        store.set(key, section["content"])
+    return section
+
+
+def build_fact_corpus(theme: str) -> list[str]:
+    """Выдача → загрузка и разбор страниц → сырые факты (без кэша корпуса)."""
+    articles = fetch_articles_from_xmlriver(theme, limit=6)
+    with timed("facts", sources=len(articles)):
+        return get_agent(FactCollector).collect_raw_facts(articles)
+
+
+class FactsMemo:
+    """
+    Факты FactFilter по H2, запомненные по (тема, H2, корпус, конфиг FactFilter).
+    missing — заголовки, которым ещё нужен вызов FactFilter.
+    """
+
+    def __init__(self, raw_facts: list[str], headlines: list[str], theme: str):
+        self.store = get_section_cache()
+        self.headlines = headlines
+        corpus, fingerprint = corpus_digest(raw_facts), config_fingerprint(FactFilter)
+        self.keys = {headline: facts_key(theme, headline, corpus, fingerprint) for headline in headlines}
+        self.filtered = {}
+        for headline, key in self.keys.items():
+            cached = self.store.get(key)
+            if cached is not None:
+                self.filtered[headline] = cached
+        self.missing = [headline for headline in headlines if headline not in self.filtered]
+        logging.info(f"[Pipeline] Факты по H2: из кэша {len(self.filtered)}, в FactFilter {len(self.missing)}")
+
+    def remember(self, fresh: dict):
+        for headline in self.missing:
+            if headline in fresh:
+                self.store.set(self.keys[headline], fresh[headline])
+                self.filtered[headline] = fresh[headline]
+
+    def result(self) -> dict:
+        return {headline: self.filtered[headline] for headline in self.headlines if headline in self.filtered}
+
+
+def _filter_facts(raw_facts: list[str], headlines: list[str], theme: str, incremental: bool) -> dict:
+    """
+    FactFilter по заголовкам. В инкрементальном режиме факты H2 запоминаются
+    (FactsMemo), и в LLM уходят только новые или изменённые H2.
+    """
+    fact_filter = get_agent(FactFilter)
+    if not incremental:
+        with timed("filter", facts=len(raw_facts), headlines=len(headlines)):
+            return fact_filter.run(raw_facts, headlines, theme=theme)
+
+    memo = FactsMemo(raw_facts, headlines, theme)
+    if memo.missing:
+        with timed("filter", facts=len(raw_facts), headlines=len(memo.missing)):
+            memo.remember(fact_filter.run(raw_facts, memo.missing, theme=theme))
+    return memo.result()
+
+
+def section_fingerprint(editors: Editors, runner_name: str) -> str:
+    """Часть ключа мемоизации блока: конфиги генератора и редакторов + режим генерации."""
+    fingerprint = config_fingerprint(ContentGenerator, *(type(editor) for _, editor in editors))
+    return f"{fingerprint}:{runner_name}"
+
+
+def generate_article(theme: str, edited_headlines: list[str], max_workers: int | None = None,
+                     progress: ProgressCallback | None = None) -> str:
+    """
+    :param max_workers: сколько блоков H2 генерировать одновременно
+                        (по умолчанию — section_concurrency из pipeline_config.json)
+    :param progress: колбэк progress(event, data) для отображения хода генерации:
+                     ("stage", {"stage": ...}) и ("section", {"index", "headline", "status"})
+    """
+    final_article, filtered_facts_dict = "", {}
+    for event, data in generate_article_stream(theme, edited_headlines, max_workers, progress):
+        if event == "article":
+            final_article, filtered_facts_dict = data["article"], data["facts"]
+    return final_article, filtered_facts_dict
+
+
+def generate_article_stream(theme: str, edited_headlines: list[str], max_workers: int | None = None,
+                            progress: ProgressCallback | None = None):
+    """
+    Потоковый режим generate_article: генератор событий
+    ("section", {"index", "headline", "content"}) — по мере готовности блоков, строго по порядку,
+    и в конце ("article", {"article": итоговый markdown, "facts": факты по H2,
+    "failed_sections": индексы блоков с ошибкой генерации}).
+    Первый блок отдаётся сразу после его стадии StyleEditor, не дожидаясь остальных.
+    """
+    logging.info("[Pipeline] Запуск генерации статьи")
+    started = time.monotonic()
+    config = load_pipeline_config()
+
+    # incremental: корпус темы, факты и готовые блоки переиспользуются между запусками,
+    # так что после правки одного H2 через LLM проходит только он
+    incremental = config.get("incremental", True)
+
+    # 1. Получаем статьи и сырые факты
+    notify_progress(progress, "stage", stage="sources")
+    raw_facts = cached_corpus(theme, build_fact_corpus) if incremental else build_fact_corpus(theme)
+
+    # 2. Фильтруем и распределяем факты по заголовкам
+    notify_progress(progress, "stage", stage="filter")
+    filtered_facts_dict = _filter_facts(raw_facts, edited_headlines, theme, incremental)
+
+    # 3. Агенты берутся из пула процесса (создаются один раз)
+    cg = get_agent(ContentGenerator)
+    editors = build_editors(config)
+
+    # 4. Генерация контента для каждого заголовка — параллельно,
+    #    порядок блоков совпадает с порядком заголовков
+    max_workers = max_workers or config.get("section_concurrency", 4)
+    max_workers = max(1, min(max_workers, len(edited_headlines) or 1))
+    logging.info(f"[Pipeline] Генерация {len(edited_headlines)} блоков, параллельно: {max_workers}")
+    notify_progress(progress, "stage", stage="sections")
+    section_runner = _generate_section_pipelined if config.get("pipelined_sections") else _generate_section
+    if incremental:
+        section_runner = functools.partial(_memoized_section, section_runner,
+                                           section_fingerprint(editors, section_runner.__name__))
+
+    # Потоки пула не наследуют contextvars — передаём контекст (приоритет LLM-вызовов) явно
+    content_list = []
+    sections_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section") as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, section_runner, cg, editors, theme, headline,
+                            filtered_facts_dict.get(headline, []), index, progress)
+            for index, headline in enumerate(edited_headlines)
+        ]
+        # Отдаём блоки по порядку: блок i уходит, как только готовы он и все до него
+        for index, future in enumerate(futures):
+            section = future.result()
+            content_list.append(section)
+            yield "section", {"index": index, **section}
+    observe_stage("sections", time.monotonic() - sections_started, sections=len(edited_headlines), workers=max_workers)
 
     # 5. Финальная сборка
-    aggregator = ArticleAggregator()
+    notify_progress(progress, "stage", stage="aggregate")
+    aggregator = get_agent(ArticleAggregator)
     try:
-        final_article = aggregator.run(content_list, theme=theme)
+        with timed("aggregate"):
+            final_article = aggregator.run(content_list, theme=theme)
     except Exception as e:
         logging.error(f"[Pipeline] Ошибка при сборке статьи: {e}")
-        final_article = "Не удалось собрать статью."
+        final_article = AGGREGATION_FAILED
 
-    return final_article, filtered_facts_dict
+    observe_stage("article", time.monotonic() - started, theme=theme, sections=len(edited_headlines))
+    yield "article", {"article": final_article, "facts": filtered_facts_dict,
+                      "failed_sections": failed_sections(content_list)}
@@ -0,0 +1,256 @@
+# services/job_store.py
+
+"""
+Общее для всех процессов состояние фоновых генераций (SQLite рядом с
+services/result_store.py). Под gunicorn у каждого воркера свой JobManager,
+а запросы статуса и SSE могут прийти в любой воркер — поэтому статус,
+ход по разделам и готовые разделы задачи читаются отсюда, а не из памяти.
+Здесь же — слоты max_concurrent_pipelines на узел (claim_slot).
+"""
+
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+from services.result_store import store_path
+
+# Живая задача обновляет updated_at не реже раза в JOB_HEARTBEAT_INTERVAL секунд
+# (heartbeat() во время выполнения, опрос слота — в очереди)
+JOB_HEARTBEAT_INTERVAL = 5.0
+# Задача queued/running без обновлений дольше этого срока считается потерянной
+# (процесс-воркер перезапущен): не занимает слот и отдаётся клиенту как ошибка, сек
+JOB_STALE_AFTER = 60
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(store_path(), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " session_id TEXT,"
+            " theme TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " sections BLOB NOT NULL,"
+            " error TEXT,"
+            " article BLOB,"
+            " created_at REAL NOT NULL,"
+            " finished_at REAL,"
+            " updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, updated_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_sections ("
+            " job_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " data BLOB NOT NULL,"
+            " PRIMARY KEY (job_id, seq))"
+        )
+        _local.conn = conn
+    return conn
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def create_job(job_id: str, theme: str, sections: list[dict], session_id: str | None = None,
+               created_at: float | None = None):
+    now = time.time()
+    _connect().execute(
+        "INSERT OR REPLACE INTO jobs (id, session_id, theme, status, stage, sections, created_at, updated_at)"
+        " VALUES (?, ?, ?, 'queued', 'queued', ?, ?, ?)",
+        (job_id, session_id, theme, _pack(sections), created_at or now, now)
+    )
+
+
+def update_job(job_id: str, *, status: str | None = None, stage: str | None = None,
+               sections: list[dict] | None = None, error: str | None = None,
+               article: str | None = None, finished: bool = False):
+    """
+    Обновляет переданные поля; updated_at — всегда (он же признак «задача жива»).
+    """
+    assignments, params = ["updated_at = ?"], [time.time()]
+    if status is not None:
+        assignments.append("status = ?")
+        params.append(status)
+    if stage is not None:
+        assignments.append("stage = ?")
+        params.append(stage)
+    if sections is not None:
+        assignments.append("sections = ?")
+        params.append(_pack(sections))
+    if error is not None:
+        assignments.append("error = ?")
+        params.append(error)
+    if article is not None:
+        assignments.append("article = ?")
+        params.append(_pack(article))
+    if finished:
+        assignments.append("finished_at = ?")
+        params.append(params[0])
+    params.append(job_id)
+    _connect().execute(f"UPDATE jobs SET {', '.join(assignments)} WHERE id = ?", params)
+
+
+def append_section(job_id: str, seq: int, data: dict):
+    conn = _connect()
+    conn.execute("INSERT OR REPLACE INTO job_sections (job_id, seq, data) VALUES (?, ?, ?)",
+                 (job_id, seq, _pack(data)))
+    conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+
+
+def get_sections(job_id: str, start: int = 0) -> list[dict]:
+    rows = _connect().execute(
+        "SELECT data FROM job_sections WHERE job_id = ? AND seq >= ? ORDER BY seq",
+        (job_id, start)
+    ).fetchall()
+    return [_unpack(row[0]) for row in rows]
+
+
+def get_job(job_id: str) -> dict | None:
+    """
+    Состояние задачи в формате Job.to_dict() или None.
+    """
+    from services.jobs import STAGES
+
+    conn = _connect()
+    row = conn.execute(
+        "SELECT id, theme, status, stage, sections, error, created_at, finished_at, updated_at"
+        " FROM jobs WHERE id = ?",
+        (job_id,)
+    ).fetchone()
+    if row is None:
+        return None
+
+    status, error = row[2], row[5]
+    if status in ("queued", "running") and time.time() - row[8] > JOB_STALE_AFTER:
+        status, error = "error", "задача потеряна: процесс-обработчик был перезапущен"
+    ready = conn.execute("SELECT COUNT(*) FROM job_sections WHERE job_id = ?", (job_id,)).fetchone()[0]
+    return {
+        "id": row[0],
+        "theme": row[1],
+        "status": status,
+        "stage": row[3],
+        "stages": STAGES,
+        "sections": _unpack(row[4]),
+        "error": error,
+        "ready_sections": ready,
+        "elapsed": round((row[7] or time.time()) - row[6], 1)
+    }
+
+
+def get_article(job_id: str) -> str | None:
+    row = _connect().execute("SELECT article FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _unpack(row[0]) if row and row[0] is not None else None
+
+
+@contextmanager
+def heartbeat(job_id: str, interval: float | None = None):
+    """
+    Пока открыт контекст, фоновый поток раз в interval секунд обновляет updated_at задачи:
+    долгий этап без событий прогресса (ожидание лимитера, загрузка источников)
+    не делает задачу «потерянной» и не освобождает её слот.
+    """
+    interval = JOB_HEARTBEAT_INTERVAL if interval is None else interval
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                update_job(job_id)
+            except Exception as e:
+                logging.warning(f"[JobStore] Не удалось обновить heartbeat задачи {job_id}: {e}")
+
+    thread = threading.Thread(target=beat, name=f"heartbeat-{job_id[:8]}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def claim_slot(job_id: str, limit: int) -> bool:
+    """
+    Переводит задачу в running, если на узле (во всех процессах, работающих с этой БД)
+    сейчас выполняется меньше limit задач. BEGIN IMMEDIATE сериализует проверку и захват.
+    """
+    conn = _connect()
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        running = conn.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = 'running' AND updated_at > ?",
+            (now - JOB_STALE_AFTER,)
+        ).fetchone()[0]
+        if running >= limit:
+            conn.execute("COMMIT")
+            return False
+        conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (now, job_id))
+        conn.execute("COMMIT")
+        return True
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def iter_events(job_id: str, heartbeat: float = 15.0, poll: float = 0.5):
+    """
+    События для SSE из любого процесса: ("section", блок) по порядку, затем
+    ("article", {"article": markdown}) или ("error", {"error": ...}).
+    Новые данные ищутся опросом БД раз в poll секунд; без них — ("ping", {})
+    раз в heartbeat секунд.
+    """
+    sent = 0
+    idle = 0.0
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            yield "error", {"error": "задача не найдена"}
+            return
+
+        new_sections = get_sections(job_id, sent)
+        for section in new_sections:
+            yield "section", section
+        sent += len(new_sections)
+
+        if job["status"] == "done" and sent >= job["ready_sections"]:
+            yield "article", {"article": get_article(job_id) or ""}
+            return
+        if job["status"] == "error":
+            yield "error", {"error": job["error"]}
+            return
+
+        idle = 0.0 if new_sections else idle + poll
+        if idle >= heartbeat:
+            idle = 0.0
+            yield "ping", {}
+        time.sleep(poll)
+
+
+def cleanup(ttl: float):
+    """
+    Удаляет задачи, завершённые (или заброшенные) больше ttl секунд назад.
+    """
+    conn = _connect()
+    threshold = time.time() - ttl
+    expired = [row[0] for row in conn.execute(
+        "SELECT id FROM jobs WHERE updated_at < ?", (threshold,)
+    ).fetchall()]
+    for job_id in expired:
+        conn.execute("DELETE FROM job_sections WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
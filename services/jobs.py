@@ -0,0 +1,186 @@
+# services/jobs.py
+
+"""
+Фоновое выполнение пайплайна генерации статьи.
+submit() сразу возвращает задачу с id, сама генерация идёт в пуле потоков
+(не больше max_concurrent_pipelines одновременно на узел — слоты общие для всех
+воркеров gunicorn), а ход работы по этапам и по каждому H2 пишется в
+services/job_store.py и читается оттуда любым процессом.
+"""
+
+import time
+import uuid
+import logging
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.generation_pipeline import generate_article_stream, load_pipeline_config
+from tools.rate_limiter import llm_priority, INTERACTIVE
+from services.result_store import save_result
+from services import job_store
+
+STAGES = ["queued", "sources", "filter", "sections", "aggregate", "done"]
+
+# Сколько хранить завершённые задачи, сек
+JOB_TTL = 3600
+
+# Как часто задача в очереди проверяет, освободился ли слот на узле, сек
+SLOT_POLL_INTERVAL = 1.0
+
+
+class Job:
+    def __init__(self, theme: str, headlines: list[str], session_id: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.theme = theme
+        self.headlines = headlines
+        self.session_id = session_id
+        self.status = "queued"       # queued | running | done | error
+        self.stage = "queued"
+        self.sections = [{"headline": h, "status": "queued"} for h in headlines]
+        self.created_at = time.time()
+        self.finished_at = None
+        self.error = None
+        self.contents = []           # готовые блоки {"index", "headline", "content"} — по порядку
+        self.article = None          # итоговый markdown
+        # Состояние меняет поток (или задача asyncio) генерации, читают обработчики запросов
+        self.lock = threading.Lock()
+
+    def on_progress(self, event: str, data: dict):
+        with self.lock:
+            if event == "stage":
+                self.stage = data["stage"]
+            elif event == "section":
+                section = self.sections[data["index"]]
+                section["status"] = data["status"]
+                if data.get("error"):
+                    section["error"] = data["error"]
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                "id": self.id,
+                "theme": self.theme,
+                "status": self.status,
+                "stage": self.stage,
+                "stages": STAGES,
+                "sections": [dict(section) for section in self.sections],
+                "error": self.error,
+                "ready_sections": len(self.contents),
+                "elapsed": round((self.finished_at or time.time()) - self.created_at, 1)
+            }
+
+    async def aiter_events(self, heartbeat: float = 15.0, poll: float = 0.25):
+        """
+        События задачи для SSE в ASGI (asgi.py) — как services/job_store.py:iter_events,
+        но из памяти процесса: ("section", блок) по порядку, затем ("article", ...)
+        или ("error", ...); ожидание — опросом раз в poll секунд, не блокируя event loop.
+        """
+        import asyncio
+
+        sent = 0
+        idle = 0.0
+        while True:
+            with self.lock:
+                new_sections = self.contents[sent:]
+                status, article, error = self.status, self.article, self.error
+
+            for section in new_sections:
+                yield "section", section
+            sent += len(new_sections)
+
+            if status == "done" and sent == len(self.contents):
+                yield "article", {"article": article}
+                return
+            if status == "error":
+                yield "error", {"error": error}
+                return
+
+            idle = 0.0 if new_sections else idle + poll
+            if idle >= heartbeat:
+                idle = 0.0
+                yield "ping", {}
+            await asyncio.sleep(poll)
+
+
+class JobManager:
+    def __init__(self, max_concurrent: int = 2):
+        self.max_concurrent = max_concurrent
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="pipeline")
+
+    def submit(self, theme: str, headlines: list[str], session_id: str | None = None) -> Job:
+        """
+        Ставит генерацию в очередь. Состояние задачи пишется в services/job_store.py,
+        готовая статья — в services/result_store.py под id задачи.
+        """
+        job = Job(theme, headlines, session_id)
+        job_store.cleanup(JOB_TTL)
+        job_store.create_job(job.id, theme, job.sections, session_id=session_id, created_at=job.created_at)
+        self.executor.submit(self._run, job)
+        logging.info(f"[Jobs] Задача {job.id} поставлена в очередь: «{theme}»")
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        Состояние задачи из общего хранилища — задача могла быть запущена другим воркером.
+        """
+        return job_store.get_job(job_id)
+
+    def _wait_slot(self, job: Job):
+        # Слоты общие для всех процессов узла; пока ждём — задача остаётся «живой» в хранилище
+        while not job_store.claim_slot(job.id, self.max_concurrent):
+            job_store.update_job(job.id)
+            time.sleep(SLOT_POLL_INTERVAL)
+
+    def _on_progress(self, job: Job, event: str, data: dict):
+        job.on_progress(event, data)
+        with job.lock:
+            stage, sections = job.stage, [dict(section) for section in job.sections]
+        job_store.update_job(job.id, stage=stage, sections=sections)
+
+    def _run(self, job: Job):
+        try:
+            self._wait_slot(job)
+            with job.lock:
+                job.status = "running"
+            final_article, filtered_facts = "", {}
+            # Задачи из веба ждут пользователя — их LLM-вызовы идут вперёд пакетных
+            with job_store.heartbeat(job.id), llm_priority(INTERACTIVE):
+                progress = functools.partial(self._on_progress, job)
+                for event, data in generate_article_stream(job.theme, job.headlines, progress=progress):
+                    if event == "section":
+                        with job.lock:
+                            job.contents.append(data)
+                            seq = len(job.contents) - 1
+                        job_store.append_section(job.id, seq, data)
+                    elif event == "article":
+                        final_article, filtered_facts = data["article"], data["facts"]
+
+            save_result(job.id, job.theme, job.headlines, final_article, filtered_facts, session_id=job.session_id)
+            with job.lock:
+                job.article = final_article
+                job.status = "done"
+                job.stage = "done"
+                job.finished_at = time.time()
+            job_store.update_job(job.id, status="done", stage="done", article=final_article, finished=True)
+        except Exception as e:
+            logging.exception(f"[Jobs] Задача {job.id} завершилась с ошибкой")
+            with job.lock:
+                job.status = "error"
+                job.error = str(e)
+                job.finished_at = time.time()
+            job_store.update_job(job.id, status="error", error=str(e), finished=True)
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                config = load_pipeline_config()
+                _manager = JobManager(max_concurrent=config.get("max_concurrent_pipelines", 2))
+    return _manager
@@ -0,0 +1,98 @@
+# services/prefetch.py
+
+"""
+Спекулятивная предзагрузка источников: пока пользователь правит заголовки,
+в фоне уже идут выдача XMLriver, загрузка и разбор страниц и collect_raw_facts.
+
+Корпус собирается через tools/cache/corpus_cache.py — тот же путь, что у пайплайна,
+поэтому /finalize_headlines либо находит готовый корпус в кэше, либо
+присоединяется к ещё идущей сборке и не запускает вторую.
+Готовый корпус лежит в кэше на диске и виден всем воркерам gunicorn, а идущая
+сборка захвачена в том же SQLite — воркер, получивший /finalize_headlines,
+дождётся её, а не начнёт свою (см. tools/cache/corpus_cache.py).
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+from services.generation_pipeline import load_pipeline_config, build_fact_corpus
+from tools.cache.corpus_cache import cached_corpus, get_corpus_cache, corpus_key
+
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+# Сколько держим запись о предзагрузке сессии (тему пользователь обычно правит минуты)
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", 15 * 60))
+# Больше задач в очереди не ставим: предзагрузка не должна вытеснять реальную генерацию
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "8"))
+
+
+class Prefetcher:
+    def __init__(self, max_workers: int = PREFETCH_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        # session_id -> (ключ темы, future, время постановки)
+        self.sessions: dict[str, tuple[str, Future, float]] = {}
+        self.lock = threading.Lock()
+
+    def _cleanup(self):
+        now = time.time()
+        for session_id, (_, future, created_at) in list(self.sessions.items()):
+            if future.done() and now - created_at > PREFETCH_TTL:
+                del self.sessions[session_id]
+
+    def _run(self, theme: str):
+        started = time.monotonic()
+        try:
+            corpus = cached_corpus(theme, build_fact_corpus)
+            logging.info(f"[Prefetch] Корпус «{theme}» готов за {time.monotonic() - started:.1f} с: {len(corpus)} фактов")
+            return corpus
+        except Exception as e:
+            logging.warning(f"[Prefetch] Не удалось собрать корпус «{theme}»: {e}")
+            return []
+
+    def prefetch(self, theme: str, session_id: str | None = None) -> Future | None:
+        """
+        Ставит сборку корпуса темы в фон. Ничего не делает, если корпус уже в кэше
+        или предзагрузка выключена. Новая тема той же сессии отменяет её прежнюю,
+        ещё не начатую предзагрузку.
+        """
+        config = load_pipeline_config()
+        if not theme or not config.get("prefetch", True) or not config.get("incremental", True):
+            return None
+
+        key = corpus_key(theme)
+        if get_corpus_cache().get(key) is not None:
+            return None
+
+        with self.lock:
+            self._cleanup()
+            previous = self.sessions.get(session_id) if session_id else None
+            if previous is not None:
+                if previous[0] == key and not previous[1].done():
+                    return previous[1]
+                previous[1].cancel()
+
+            pending = sum(1 for _, future, _ in self.sessions.values() if not future.done())
+            if pending >= PREFETCH_MAX_PENDING:
+                logging.info(f"[Prefetch] Очередь заполнена ({pending}), «{theme}» пропущена")
+                return None
+
+            future = self.executor.submit(self._run, theme)
+            if session_id:
+                self.sessions[session_id] = (key, future, time.time())
+        logging.info(f"[Prefetch] Предзагрузка источников для «{theme}»")
+        return future
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher() -> Prefetcher:
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = Prefetcher()
+    return _prefetcher
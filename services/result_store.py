@@ -0,0 +1,105 @@
+# services/result_store.py
+
+"""
+Серверное хранилище результатов генерации (SQLite, сжатые zlib блобы).
+В cookie-сессии остаётся только id результата; сами статьи и факты
+лежат здесь и могут быть показаны повторно без перегенерации.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+
+DEFAULT_STORE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "data", "results.sqlite"
+)
+
+_local = threading.local()
+
+
+def store_path() -> str:
+    path = os.getenv("RESULT_STORE_PATH", DEFAULT_STORE_PATH)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def _connect() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(store_path(), timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " id TEXT PRIMARY KEY,"
+            " session_id TEXT,"
+            " theme TEXT NOT NULL,"
+            " headlines BLOB NOT NULL,"
+            " article BLOB NOT NULL,"
+            " facts BLOB NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_session ON results (session_id, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_results_theme ON results (theme, created_at)")
+        _local.conn = conn
+    return conn
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def save_result(result_id: str, theme: str, headlines: list[str], article: str, facts: dict,
+                session_id: str | None = None):
+    _connect().execute(
+        "INSERT OR REPLACE INTO results (id, session_id, theme, headlines, article, facts, created_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (result_id, session_id, theme, _pack(headlines), _pack(article), _pack(facts), time.time())
+    )
+
+
+def get_result(result_id: str) -> dict | None:
+    row = _connect().execute(
+        "SELECT id, session_id, theme, headlines, article, facts, created_at FROM results WHERE id = ?",
+        (result_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    return {
+        "id": row[0],
+        "session_id": row[1],
+        "theme": row[2],
+        "headlines": _unpack(row[3]),
+        "article": _unpack(row[4]),
+        "facts": _unpack(row[5]),
+        "created_at": row[6]
+    }
+
+
+def list_results(theme: str | None = None, session_id: str | None = None, limit: int = 50) -> list[dict]:
+    """
+    Краткий список прошлых статей (без тел), новые — первыми.
+    """
+    query = "SELECT id, theme, created_at, length(article) FROM results"
+    conditions, params = [], []
+    if theme:
+        conditions.append("theme = ?")
+        params.append(theme)
+    if session_id:
+        conditions.append("session_id = ?")
+        params.append(session_id)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+
+    return [
+        {"id": row[0], "theme": row[1], "created_at": row[2], "size": row[3]}
+        for row in _connect().execute(query, params).fetchall()
+    ]
@@ -0,0 +1,98 @@
+# test_batch_runner.py
+
+import json
+
+import pytest
+
+from services import batch_runner
+from services.generation_pipeline import AGGREGATION_FAILED
+
+
+class FakePipeline:
+    """generate_article_stream-заглушка: ответы по теме, по очереди для каждой попытки."""
+
+    def __init__(self, outcomes: dict[str, list[tuple[str, list[int]]]]):
+        self.outcomes = outcomes
+        self.calls = []
+
+    def __call__(self, theme, headlines, max_workers=None, progress=None):
+        self.calls.append(theme)
+        article, failed = self.outcomes[theme].pop(0)
+        for index, headline in enumerate(headlines):
+            yield "section", {"index": index, "headline": headline, "content": "Текст"}
+        yield "article", {"article": article, "facts": {}, "failed_sections": failed}
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(batch_runner, "RETRY_BASE_DELAY", 0.0)
+
+
+def _write_input(tmp_path, lines: list[str]):
+    path = tmp_path / "themes.jsonl"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_failed_sections_and_aggregation_are_errors(tmp_path, monkeypatch):
+    pipeline = FakePipeline({
+        "Ок": [("# Ок", [])],
+        "Блоки": [("# Блоки", [1]), ("# Блоки", [0])],
+        "Сборка": [(AGGREGATION_FAILED, []), (AGGREGATION_FAILED, [])]
+    })
+    monkeypatch.setattr(batch_runner, "generate_article_stream", pipeline)
+    source = _write_input(tmp_path, ['{"id": "ok", "input": "Ок: A; B"}',
+                                     '{"id": "sections", "input": "Блоки: A; B"}',
+                                     '{"id": "aggregate", "input": "Сборка: A"}'])
+    output = str(tmp_path / "out.jsonl")
+
+    stats = batch_runner.BatchRunner(output, concurrency=1, retries=1).run(batch_runner.read_items(source))
+
+    assert stats == {"done": 1, "error": 2, "skipped": 0}
+    records = {record["id"]: record for record in _records(output)}
+    assert records["ok"]["status"] == "done" and "error" not in records["ok"]
+    assert records["sections"]["status"] == "error" and "A" in records["sections"]["error"]
+    assert records["aggregate"]["status"] == "error"
+    assert pipeline.calls.count("Блоки") == pipeline.calls.count("Сборка") == 2
+
+
+def test_retry_succeeds(tmp_path, monkeypatch):
+    pipeline = FakePipeline({"Тема": [("# Тема", [0]), ("# Тема", [])]})
+    monkeypatch.setattr(batch_runner, "generate_article_stream", pipeline)
+    source = _write_input(tmp_path, ['"Тема: A"'])
+    output = str(tmp_path / "out.jsonl")
+
+    stats = batch_runner.BatchRunner(output, concurrency=1, retries=1).run(batch_runner.read_items(source))
+
+    assert stats["done"] == 1
+    [record] = _records(output)
+    assert record["status"] == "done" and record["article"] == "# Тема" and "error" not in record
+
+
+def test_resume_skips_done_and_reruns_errors(tmp_path, monkeypatch):
+    source = _write_input(tmp_path, ['{"id": "a", "input": "А: H"}', '{"id": "b", "input": "Б: H"}'])
+    output = str(tmp_path / "out.jsonl")
+
+    first = FakePipeline({"А": [("# А", [])], "Б": [("# Б", [0])]})
+    monkeypatch.setattr(batch_runner, "generate_article_stream", first)
+    batch_runner.BatchRunner(output, concurrency=1, retries=0).run(batch_runner.read_items(source))
+    assert batch_runner.read_checkpoint(output) == {"a"}
+
+    second = FakePipeline({"Б": [("# Б", [])]})
+    monkeypatch.setattr(batch_runner, "generate_article_stream", second)
+    stats = batch_runner.BatchRunner(output, concurrency=1, retries=0).run(batch_runner.read_items(source))
+
+    assert second.calls == ["Б"]
+    assert stats == {"done": 1, "error": 0, "skipped": 1}
+    assert batch_runner.read_checkpoint(output) == {"a", "b"}
+
+
+def test_items_without_headlines_are_rejected(tmp_path):
+    source = _write_input(tmp_path, ['"Тема: A; B"', '{"theme": "Пусто", "headlines": []}', '"Без заголовков"'])
+    items = list(batch_runner.read_items(source))
+    assert [(item["theme"], item["headlines"]) for item in items] == [("Тема", ["A", "B"])]
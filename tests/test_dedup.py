@@ -0,0 +1,29 @@
+# test_dedup.py
+
+from tools.filters.dedup import deduplicate
+
+BASE = "Кинезиологический тейп помогает снизить боль в мышцах после тренировки"
+OTHER = "Совсем другой абзац про стоимость тейпов в аптеках города"
+NEAR = "Кинезиологический тейп помогает снизить боль в суставах после тренировки"
+
+
+def test_exact_and_case_duplicates_are_removed():
+    kept, removed = deduplicate([BASE, BASE + "!", OTHER, BASE.upper()])
+    assert kept == [BASE, OTHER]
+    assert removed == 2
+
+
+def test_first_occurrence_and_order_are_kept():
+    kept, removed = deduplicate([OTHER, BASE, OTHER])
+    assert kept == [OTHER, BASE]
+    assert removed == 1
+
+
+def test_threshold():
+    # Отличаются одним словом: Жаккар по шинглам из трёх слов — около 0.4
+    assert deduplicate([BASE, NEAR], threshold=0.3) == ([BASE], 1)
+    assert deduplicate([BASE, NEAR], threshold=0.9) == ([BASE, NEAR], 0)
+
+
+def test_texts_without_words_are_kept():
+    assert deduplicate(["", "...", BASE]) == (["", "...", BASE], 0)
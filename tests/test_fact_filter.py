@@ -0,0 +1,27 @@
+# test_fact_filter.py
+
+from agents.fact_compressor import FactFilter
+
+HEADLINES = ["Польза тейпирования", "Противопоказания"]
+
+
+def test_parse_response_strips_candidates_suffix():
+    response = '{"Польза тейпирования (кандидаты: 1, 3)": ["Факт 1"], "Противопоказания (кандидаты: нет)": []}'
+    assert FactFilter._parse_response(response, HEADLINES) == {
+        "Польза тейпирования": ["Факт 1"],
+        "Противопоказания": []
+    }
+
+
+def test_parse_response_matches_list_marker_case_and_spaces():
+    response = '{"- польза  тейпирования": ["Факт 1"], "ПРОТИВОПОКАЗАНИЯ": ["Факт 2"]}'
+    assert FactFilter._parse_response(response, HEADLINES) == {
+        "Польза тейпирования": ["Факт 1"],
+        "Противопоказания": ["Факт 2"]
+    }
+
+
+def test_parse_response_drops_unknown_keys_and_bad_json():
+    assert FactFilter._parse_response('{"Другое": ["Факт"]}', HEADLINES) == {}
+    assert FactFilter._parse_response("не JSON", HEADLINES) == {}
+    assert FactFilter._parse_response('["список"]', HEADLINES) == {}
@@ -0,0 +1,35 @@
+# test_fact_router.py
+
+from tools.filters.fact_router import stem, tokenize, route_facts
+
+FACTS = [
+    "Тейп снижает боль в колене.",
+    "Цена тейпа около 500 рублей.",
+    "Боль в спине уменьшается после тейпирования.",
+    "Погода сегодня хорошая."
+]
+
+
+def test_stem_merges_word_forms():
+    assert stem("тейпирование") == stem("тейпирования") == stem("тейпированием") == "тейпирован"
+    assert stem("красивая") == stem("красивый") == "красив"
+
+
+def test_stem_normalizes_case_and_yo():
+    assert stem("Ёлка") == stem("елка")
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("Польза и вред тейпирования") == ["польз", "вред", "тейпирован"]
+
+
+def test_route_facts_ranks_by_relevance():
+    routed = route_facts(FACTS, ["Боль в колене", "Цена тейпа"], top_k=2)
+    assert routed["Боль в колене"] == [FACTS[0], FACTS[2]]
+    assert routed["Цена тейпа"][0] == FACTS[1]
+    assert all(len(facts) <= 2 for facts in routed.values())
+
+
+def test_route_facts_without_matches():
+    assert route_facts(FACTS, ["Космос"]) == {"Космос": []}
+    assert route_facts([], ["Боль"]) == {"Боль": []}
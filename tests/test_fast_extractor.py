@@ -0,0 +1,38 @@
+# test_fast_extractor.py
+
+from tools.parsers.fast_extractor import extract_text
+
+
+def test_inline_tags_do_not_split_words():
+    assert extract_text("<p>Кинезио<wbr>тейпирование</p>") == "Кинезиотейпирование"
+    assert extract_text("<p>H<sub>2</sub>O</p>") == "H2O"
+    assert extract_text("<p>м<sup>2</sup> и <a href='#'>ссыл</a>ка, <b>жир</b><i>ный</i></p>") == "м2 и ссылка, жирный"
+
+
+def test_block_tags_and_br_split_words():
+    assert extract_text("<p>первая<br>вторая</p>") == "первая вторая"
+    assert extract_text("<li>пункт<ul><li>вложенный</li></ul>хвост</li>") == "• пункт вложенный хвост"
+
+
+def test_nested_blocks_are_not_duplicated():
+    html = "<blockquote>Цитата<p>внутри</p></blockquote><ul><li><p>Пункт</p></li></ul>"
+    assert extract_text(html) == "Цитата: Цитата внутри\n\n• Пункт"
+
+
+def test_table_rows_and_cells():
+    html = "<table><tr><th>Тип</th><th>Цена</th></tr><tr><td>Тейп<span>-лента</span></td><td>100<br>руб.</td></tr></table>"
+    assert extract_text(html) == "Тип | Цена\n\nТейп-лента | 100 руб."
+
+
+def test_skipped_subtrees():
+    html = (
+        "<html><head><title>Заголовок</title></head><body>"
+        "<nav><p>Меню</p></nav><div role='navigation'><p>Ещё меню</p></div>"
+        "<p>Текст<script>var x = 1;</script> статьи</p>"
+        "<footer><p>Подвал</p></footer></body></html>"
+    )
+    assert extract_text(html) == "Текст статьи"
+
+
+def test_empty_input():
+    assert extract_text("") == ""
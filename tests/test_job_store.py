@@ -0,0 +1,98 @@
+# test_job_store.py
+
+import time
+import threading
+
+import pytest
+
+from services import job_store, result_store
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.sqlite"))
+    # Соединения кэшируются по потокам — сбрасываем, чтобы открыть временную БД
+    monkeypatch.setattr(job_store, "_local", threading.local())
+    monkeypatch.setattr(result_store, "_local", threading.local())
+
+
+def _create(job_id: str, headlines=("H1", "H2")):
+    job_store.create_job(job_id, "Тема", [{"headline": h, "status": "queued"} for h in headlines])
+
+
+def test_claim_slot_respects_limit():
+    for job_id in ("a", "b", "c"):
+        _create(job_id)
+
+    assert job_store.claim_slot("a", 2)
+    assert job_store.claim_slot("b", 2)
+    assert not job_store.claim_slot("c", 2)
+    assert job_store.get_job("c")["status"] == "queued"
+
+    job_store.update_job("a", status="done", finished=True)
+    assert job_store.claim_slot("c", 2)
+    assert job_store.get_job("c")["status"] == "running"
+
+
+def test_stale_job_is_lost_and_frees_its_slot(monkeypatch):
+    _create("a")
+    _create("b")
+    assert job_store.claim_slot("a", 1)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + job_store.JOB_STALE_AFTER + 1)
+    job = job_store.get_job("a")
+    assert job["status"] == "error" and "потеряна" in job["error"]
+    assert job_store.claim_slot("b", 1)
+
+
+def test_heartbeat_keeps_job_alive(monkeypatch):
+    monkeypatch.setattr(job_store, "JOB_STALE_AFTER", 0.3)
+    _create("a")
+    _create("b")
+    assert job_store.claim_slot("a", 1)
+
+    with job_store.heartbeat("a", interval=0.05):
+        time.sleep(0.6)
+        assert job_store.get_job("a")["status"] == "running"
+        assert not job_store.claim_slot("b", 1)
+
+    time.sleep(0.4)
+    assert job_store.get_job("a")["status"] == "error"
+    assert job_store.claim_slot("b", 1)
+
+
+def test_iter_events_sections_then_article():
+    _create("a")
+    job_store.claim_slot("a", 1)
+    job_store.append_section("a", 0, {"index": 0, "headline": "H1", "content": "Текст 1"})
+
+    def finish():
+        time.sleep(0.1)
+        job_store.append_section("a", 1, {"index": 1, "headline": "H2", "content": "Текст 2"})
+        job_store.update_job("a", status="done", stage="done", article="# Статья", finished=True)
+
+    thread = threading.Thread(target=finish)
+    thread.start()
+    events = list(job_store.iter_events("a", heartbeat=10, poll=0.02))
+    thread.join()
+
+    assert events == [
+        ("section", {"index": 0, "headline": "H1", "content": "Текст 1"}),
+        ("section", {"index": 1, "headline": "H2", "content": "Текст 2"}),
+        ("article", {"article": "# Статья"})
+    ]
+    assert job_store.get_job("a")["ready_sections"] == 2
+
+
+def test_iter_events_error_and_missing_job():
+    _create("a")
+    job_store.update_job("a", status="error", error="упало", finished=True)
+    assert list(job_store.iter_events("a", poll=0.01)) == [("error", {"error": "упало"})]
+    assert list(job_store.iter_events("missing", poll=0.01)) == [("error", {"error": "задача не найдена"})]
+
+
+def test_iter_events_pings_while_idle():
+    _create("a")
+    events = job_store.iter_events("a", heartbeat=0.05, poll=0.01)
+    assert next(events) == ("ping", {})
@@ -0,0 +1,61 @@
+# test_rate_limiter.py
+
+import time
+import threading
+
+from tools.rate_limiter import RateLimiter, INTERACTIVE, BATCH, llm_priority, current_priority
+
+
+def _start(limiter: RateLimiter, order: list, name: str, priority: int) -> threading.Thread:
+    def run():
+        limiter.acquire(1, priority=priority)
+        order.append(name)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_for_waiters(limiter: RateLimiter, count: int):
+    deadline = time.monotonic() + 5
+    while len(limiter.waiters) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_interactive_goes_before_batch():
+    # 600 запросов в минуту — один запрос в 0.1 с; бакет запросов сразу пустой
+    limiter = RateLimiter(rpm=600, tpm=1_000_000)
+    limiter.requests.level = 0
+    order = []
+
+    threads = [_start(limiter, order, "batch-1", BATCH), _start(limiter, order, "batch-2", BATCH)]
+    _wait_for_waiters(limiter, 2)
+    threads.append(_start(limiter, order, "interactive", INTERACTIVE))
+    _wait_for_waiters(limiter, 3)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_pause_delays_acquire():
+    limiter = RateLimiter(rpm=6000, tpm=1_000_000)
+    limiter.pause(0.3)
+    started = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - started >= 0.25
+
+
+def test_acquire_without_waiting_when_quota_is_available():
+    limiter = RateLimiter(rpm=60, tpm=1000)
+    started = time.monotonic()
+    limiter.acquire(100)
+    assert time.monotonic() - started < 0.1
+    assert limiter.tokens.level <= 900
+
+
+def test_llm_priority_context():
+    assert current_priority() == INTERACTIVE
+    with llm_priority(BATCH):
+        assert current_priority() == BATCH
+    assert current_priority() == INTERACTIVE
@@ -0,0 +1,45 @@
+# test_result_store.py
+
+import threading
+
+import pytest
+
+from services import result_store
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.sqlite"))
+    monkeypatch.setattr(result_store, "_local", threading.local())
+    result_store.save_result("r1", "Тейпы", ["H1"], "# Статья 1", {"H1": ["Факт"]}, session_id="s1")
+    result_store.save_result("r2", "Тейпы", ["H2"], "# Статья 2", {}, session_id="s2")
+    result_store.save_result("r3", "Бег", ["H3"], "# Статья 3", {})
+
+
+def test_get_result_roundtrip():
+    stored = result_store.get_result("r1")
+    assert stored["article"] == "# Статья 1"
+    assert stored["headlines"] == ["H1"]
+    assert stored["facts"] == {"H1": ["Факт"]}
+    assert stored["session_id"] == "s1"
+    assert result_store.get_result("missing") is None
+
+
+def test_list_results_filters():
+    assert {item["id"] for item in result_store.list_results()} == {"r1", "r2", "r3"}
+    assert {item["id"] for item in result_store.list_results(theme="Тейпы")} == {"r1", "r2"}
+    assert [item["id"] for item in result_store.list_results(session_id="s1")] == ["r1"]
+    assert result_store.list_results(theme="Бег", session_id="s1") == []
+
+
+def test_my_articles_without_session_are_empty():
+    from app import app
+
+    client = app.test_client()
+    page = client.get("/articles?mine=1").get_data(as_text=True)
+    assert "/articles/r1" not in page and "/articles/r3" not in page
+
+    with client.session_transaction() as session:
+        session["sid"] = "s1"
+    page = client.get("/articles?mine=1").get_data(as_text=True)
+    assert "/articles/r1" in page and "/articles/r2" not in page
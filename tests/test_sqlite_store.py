@@ -0,0 +1,68 @@
+# test_sqlite_store.py
+
+import time
+
+from tools.cache.sqlite_store import SqliteStore
+
+
+def test_set_and_get(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.sqlite"))
+    store.set("key", {"facts": ["Факт"]})
+    assert store.get("key") == {"facts": ["Факт"]}
+    assert store.get("missing") is None
+
+
+def test_ttl(tmp_path, monkeypatch):
+    store = SqliteStore(str(tmp_path / "cache.sqlite"), ttl=60)
+    store.set("key", "value")
+    assert store.get("key") == "value"
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    # Просроченная запись не отдаётся get, но видна lookup (для условной ревалидации)
+    assert store.get("key") is None
+    entry = store.lookup("key")
+    assert entry is not None and entry.expired and entry.value == "value"
+
+    store.touch("key")
+    assert store.get("key") == "value"
+
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+
+    probe = SqliteStore(str(tmp_path / "probe.sqlite"))
+    probe.set("probe", "x" * 10)
+    size = probe.total_size()
+
+    # Помещаются ровно три записи
+    store = SqliteStore(str(tmp_path / "cache.sqlite"), max_bytes=size * 3)
+    for key in ("a", "b", "c"):
+        clock[0] += 1
+        store.set(key, "x" * 10)
+
+    clock[0] += 1
+    assert store.get("a") == "x" * 10   # «a» — недавно использована
+    clock[0] += 1
+    store.set("d", "x" * 10)
+
+    # Вытеснение идёт до 90% лимита, начиная с самых давних по обращению: «b», затем «c»
+    assert store.get("b") is None
+    assert store.get("c") is None
+    assert store.get("a") == store.get("d") == "x" * 10
+    assert store.total_size() <= size * 3 * 0.9
+
+
+def test_claim(tmp_path, monkeypatch):
+    store = SqliteStore(str(tmp_path / "cache.sqlite"))
+    assert store.claim("theme", "owner-1", ttl=60)
+    assert not store.claim("theme", "owner-2", ttl=60)
+    assert store.is_claimed("theme")
+
+    store.release("theme", "owner-1")
+    assert store.claim("theme", "owner-2", ttl=60)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert store.claim("theme", "owner-3", ttl=60)  # захват истёк
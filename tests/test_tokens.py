@@ -0,0 +1,50 @@
+# test_tokens.py
+
+import pytest
+
+from tools import tokens
+
+
+class _WordEncoding:
+    """Кодировка без загрузки словаря tiktoken: одно слово — один токен."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+    def decode(self, words):
+        return " ".join(words)
+
+
+@pytest.fixture(autouse=True)
+def word_encoding(monkeypatch):
+    monkeypatch.setattr(tokens, "get_encoding", lambda model_name="gpt-4": _WordEncoding())
+
+
+def _words(count: int, start: int = 0) -> str:
+    return " ".join(f"w{i}" for i in range(start, start + count))
+
+
+def test_count_tokens():
+    assert tokens.count_tokens(_words(7)) == 7
+
+
+def test_chunks_do_not_exceed_budget():
+    texts = [_words(4, 0), _words(4, 10), _words(4, 20)]
+    chunks = tokens.chunk_by_tokens(texts, chunk_tokens=9, separator=" ")
+    assert all(tokens.count_tokens(chunk) <= 9 for chunk in chunks)
+    assert " ".join(chunks).split() == " ".join(texts).split()
+
+
+def test_paragraphs_are_joined_until_budget():
+    chunks = tokens.chunk_by_tokens(["a b\n\nc d\n\ne f"], chunk_tokens=4)
+    assert chunks == ["a b\n\nc d", "e f"]
+
+
+def test_long_paragraph_is_split():
+    chunks = tokens.chunk_by_tokens([_words(10)], chunk_tokens=4)
+    assert [tokens.count_tokens(chunk) for chunk in chunks] == [4, 4, 2]
+
+
+def test_total_budget_drops_the_rest():
+    chunks = tokens.chunk_by_tokens([_words(3), _words(3, 3), _words(3, 6)], chunk_tokens=3, max_total_tokens=6)
+    assert chunks == [_words(3), _words(3, 3)]
@@ -0,0 +1,147 @@
+# tools/cache/corpus_cache.py
+
+"""
+Кэш корпуса сырых фактов по теме (выдача → страницы → collect_raw_facts).
+Повторная генерация по той же теме (правка заголовков, повторный запуск)
+не ходит ни в XMLriver, ни на сайты. Одновременные сборки корпуса одной темы
+склеиваются в одну — второй вызов ждёт результата первого: внутри процесса через
+Future (или asyncio.Task), между процессами (воркеры gunicorn, asgi.py, batch_runner)
+через захват ключа в SQLite (SqliteStore.claim). Захват живёт CORPUS_BUILD_CLAIM_TTL
+секунд: если собиравший процесс упал, после этого срока сборку начнёт другой.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable
+
+from tools.cache.sqlite_store import SqliteStore, cache_path
+from tools.cache.serp_cache import normalize_query
+
+CORPUS_CACHE_TTL = float(os.getenv("CORPUS_CACHE_TTL", 24 * 3600))
+CORPUS_CACHE_MAX_BYTES = int(os.getenv("CORPUS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# На сколько секунд процесс захватывает сборку корпуса темы (с запасом на выдачу и загрузку страниц)
+CORPUS_BUILD_CLAIM_TTL = float(os.getenv("CORPUS_BUILD_CLAIM_TTL", 300))
+# Как часто процесс, ждущий чужую сборку, проверяет кэш, сек
+CORPUS_CLAIM_POLL = 0.5
+
+_store = None
+_store_lock = threading.Lock()
+
+_in_flight: dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+_async_in_flight: dict[str, asyncio.Task] = {}
+
+
+def get_corpus_cache() -> SqliteStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SqliteStore(cache_path("corpus.sqlite"), ttl=CORPUS_CACHE_TTL, max_bytes=CORPUS_CACHE_MAX_BYTES)
+    return _store
+
+
+def corpus_key(theme: str) -> str:
+    return normalize_query(theme)
+
+
+def cached_corpus(theme: str, build: Callable[[str], list[str]]) -> list[str]:
+    """
+    Возвращает корпус темы из кэша или собирает его через build(theme).
+    Если корпус этой темы уже собирается в другом потоке или процессе — ждёт его.
+    Пустой корпус (ошибка выдачи или загрузки) не кэшируется.
+    """
+    key = corpus_key(theme)
+    store = get_corpus_cache()
+
+    cached = store.get(key)
+    if cached is not None:
+        return cached
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _in_flight[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        corpus = _claimed_build(store, key, theme, build)
+        future.set_result(corpus)
+        return corpus
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+
+def _claimed_build(store: SqliteStore, key: str, theme: str, build: Callable[[str], list[str]]) -> list[str]:
+    owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+    while not store.claim(key, owner, CORPUS_BUILD_CLAIM_TTL):
+        # Корпус собирает другой процесс — ждём, пока он появится в кэше или захват снимут
+        time.sleep(CORPUS_CLAIM_POLL)
+        cached = store.get(key)
+        if cached is not None:
+            return cached
+    try:
+        # Пока ждали захват, корпус мог собрать другой процесс
+        cached = store.get(key)
+        if cached is not None:
+            return cached
+        corpus = build(theme)
+        if corpus:
+            store.set(key, corpus)
+        return corpus
+    finally:
+        store.release(key, owner)
+
+
+async def _aclaimed_build(store: SqliteStore, key: str, theme: str,
+                          build: Callable[[str], Awaitable[list[str]]]) -> list[str]:
+    owner = f"{os.getpid()}:{uuid.uuid4().hex}"
+    while not await asyncio.to_thread(store.claim, key, owner, CORPUS_BUILD_CLAIM_TTL):
+        await asyncio.sleep(CORPUS_CLAIM_POLL)
+        cached = await asyncio.to_thread(store.get, key)
+        if cached is not None:
+            return cached
+    try:
+        cached = await asyncio.to_thread(store.get, key)
+        if cached is not None:
+            return cached
+        corpus = await build(theme)
+        if corpus:
+            await asyncio.to_thread(store.set, key, corpus)
+        return corpus
+    finally:
+        await asyncio.to_thread(store.release, key, owner)
+
+
+async def acached_corpus(theme: str, build: Callable[[str], Awaitable[list[str]]]) -> list[str]:
+    """
+    Асинхронный cached_corpus: сборки одной темы в event loop склеиваются в одну задачу,
+    между процессами — тот же захват в SQLite; обращения к SQLite идут в потоках.
+    """
+    key = corpus_key(theme)
+    store = get_corpus_cache()
+
+    cached = await asyncio.to_thread(store.get, key)
+    if cached is not None:
+        return cached
+
+    task = _async_in_flight.get(key)
+    if task is None:
+        task = asyncio.create_task(_aclaimed_build(store, key, theme, build))
+        _async_in_flight[key] = task
+        task.add_done_callback(lambda _: _async_in_flight.pop(key, None))
+    # shield: отмена одного ожидающего не должна отменять общую сборку
+    return await asyncio.shield(task)
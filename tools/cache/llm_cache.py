@@ -0,0 +1,54 @@
+# tools/cache/llm_cache.py
+
+"""
+Кэш ответов LLM с адресацией по содержимому: ключ — хэш от модели,
+параметров сэмплирования (llm_string LangChain) и полностью отрендеренного промпта.
+Подключается к ChatOpenAI через параметр cache= (см. agents/llm_factory.py).
+"""
+
+import os
+import hashlib
+import threading
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import Generation
+
+from tools.cache.sqlite_store import SqliteStore, cache_path
+
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class SqliteLLMCache(BaseCache):
+    def __init__(self, store: SqliteStore):
+        self.store = store
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        cached = self.store.get(self._key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [loads(item) for item in cached]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        self.store.set(self._key(prompt, llm_string), [dumps(gen) for gen in return_val])
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+
+def get_llm_cache() -> SqliteLLMCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                store = SqliteStore(cache_path("llm.sqlite"), ttl=None, max_bytes=LLM_CACHE_MAX_BYTES)
+                _cache = SqliteLLMCache(store)
+    return _cache
@@ -0,0 +1,36 @@
+# tools/cache/page_cache.py
+
+"""
+Дисковый кэш загруженных страниц: по URL храним сжатый HTML, извлечённый текст
+и валидаторы (ETag / Last-Modified) для условных запросов.
+"""
+
+import os
+import threading
+
+from tools.cache.sqlite_store import SqliteStore, cache_path
+
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", 7 * 24 * 3600))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_page_cache() -> SqliteStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SqliteStore(cache_path("pages.sqlite"), ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES)
+    return _store
+
+
+def conditional_headers(cached: dict) -> dict:
+    """Заголовки для ревалидации устаревшей записи."""
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
@@ -0,0 +1,47 @@
+# tools/cache/section_cache.py
+
+"""
+Мемоизация результатов по подзаголовкам для инкрементальной перегенерации:
+- факты FactFilter для H2 — ключ (тема, H2, хэш корпуса, хэш конфига FactFilter);
+- готовый текст блока — ключ (тема, H2, факты блока, хэш конфигов агентов).
+При правке одного заголовка LLM-стадии проходит только он, остальные блоки берутся отсюда.
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+from tools.cache.sqlite_store import SqliteStore, cache_path
+from tools.cache.serp_cache import normalize_query
+
+SECTION_CACHE_TTL = float(os.getenv("SECTION_CACHE_TTL", 7 * 24 * 3600))
+SECTION_CACHE_MAX_BYTES = int(os.getenv("SECTION_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_section_cache() -> SqliteStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SqliteStore(cache_path("sections.sqlite"), ttl=SECTION_CACHE_TTL, max_bytes=SECTION_CACHE_MAX_BYTES)
+    return _store
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def corpus_digest(raw_facts: list[str]) -> str:
+    return _digest(raw_facts)
+
+
+def facts_key(theme: str, headline: str, corpus: str, fingerprint: str) -> str:
+    return "facts:" + _digest(normalize_query(theme), headline.strip(), corpus, fingerprint)
+
+
+def section_key(theme: str, headline: str, facts, fingerprint: str) -> str:
+    return "section:" + _digest(normalize_query(theme), headline.strip(), facts, fingerprint)
@@ -0,0 +1,107 @@
+# tools/cache/serp_cache.py
+
+"""
+Кэш поисковой выдачи XMLriver: ключ — нормализованный запрос + limit.
+Одновременные одинаковые запросы склеиваются в один вызов API.
+"""
+
+import os
+import re
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable
+
+from tools.cache.sqlite_store import SqliteStore, cache_path
+
+SERP_CACHE_TTL = float(os.getenv("SERP_CACHE_TTL", 24 * 3600))
+
+_store = None
+_store_lock = threading.Lock()
+
+_in_flight: dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+# То же для event loop (services/async_pipeline.py): запросы, выполняющиеся сейчас
+_async_in_flight: dict[str, asyncio.Task] = {}
+
+
+def get_serp_cache() -> SqliteStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SqliteStore(cache_path("serp.sqlite"), ttl=SERP_CACHE_TTL)
+    return _store
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def serp_key(query: str, limit: int) -> str:
+    return f"{normalize_query(query)}|{limit}"
+
+
+def cached_search(query: str, limit: int, search: Callable[[str, int], list[dict]]) -> list[dict]:
+    """
+    Возвращает выдачу из кэша или выполняет search(query, limit).
+    Если такой же запрос уже выполняется в другом потоке — ждёт его результата.
+    Пустая выдача (ошибка API) не кэшируется.
+    """
+    key = serp_key(query, limit)
+    store = get_serp_cache()
+
+    cached = store.get(key)
+    if cached is not None:
+        return cached
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _in_flight[key] = future
+
+    if not owner:
+        return future.result()
+
+    try:
+        results = search(query, limit)
+        if results:
+            store.set(key, results)
+        future.set_result(results)
+        return results
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+
+async def acached_search(query: str, limit: int, search: Callable[[str, int], Awaitable[list[dict]]]) -> list[dict]:
+    """
+    Асинхронный cached_search: одинаковые запросы в event loop ждут одну задачу search,
+    обращения к SQLite идут в потоках.
+    """
+    key = serp_key(query, limit)
+    store = get_serp_cache()
+
+    cached = await asyncio.to_thread(store.get, key)
+    if cached is not None:
+        return cached
+
+    task = _async_in_flight.get(key)
+    if task is None:
+        async def run():
+            results = await search(query, limit)
+            if results:
+                await asyncio.to_thread(store.set, key, results)
+            return results
+
+        task = asyncio.create_task(run())
+        _async_in_flight[key] = task
+        task.add_done_callback(lambda _: _async_in_flight.pop(key, None))
+    # shield: отмена одного ожидающего не должна отменять общий запрос
+    return await asyncio.shield(task)
@@ -0,0 +1,194 @@
+# tools/cache/sqlite_store.py
+
+"""
+Общее хранилище для кэшей проекта: SQLite-файл, значения — JSON, сжатый zlib.
+Поддерживает TTL, ограничение на суммарный размер и LRU-вытеснение
+(по времени последнего обращения). Безопасно для потоков и процессов (WAL).
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+from typing import Any
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))), ".cache"
+)
+
+
+def cache_path(filename: str) -> str:
+    """
+    Путь к файлу кэша. Каталог задаётся переменной CONTENT_FACTORY_CACHE_DIR
+    (по умолчанию — .cache в корне проекта).
+    """
+    cache_dir = os.getenv("CONTENT_FACTORY_CACHE_DIR", DEFAULT_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+
+class CacheEntry:
+    def __init__(self, value: Any, created_at: float, ttl: float | None):
+        self.value = value
+        self.created_at = created_at
+        self.ttl = ttl
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def expired(self) -> bool:
+        return self.ttl is not None and self.age > self.ttl
+
+
+class SqliteStore:
+    """
+    Ключ-значение с TTL и LRU-вытеснением по размеру.
+
+    :param path: путь к файлу SQLite
+    :param ttl: время жизни записи в секундах (None — бессрочно)
+    :param max_bytes: предельный суммарный размер сжатых значений (None — без лимита)
+    """
+
+    def __init__(self, path: str, ttl: float | None = None, max_bytes: int | None = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS claims ("
+            " key TEXT PRIMARY KEY,"
+            " owner TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def _pack(value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"), 6)
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Any:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def lookup(self, key: str) -> CacheEntry | None:
+        """
+        Возвращает запись вместе с её возрастом — в том числе просроченную
+        (нужно для условной ревалидации). Отмечает обращение для LRU.
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        try:
+            return CacheEntry(self._unpack(row[0]), row[1], self.ttl)
+        except Exception as e:
+            logging.warning(f"[SqliteStore] Повреждённая запись {key!r} в {self.path}: {e}")
+            self.delete(key)
+            return None
+
+    def get(self, key: str) -> Any | None:
+        entry = self.lookup(key)
+        if entry is None or entry.expired:
+            return None
+        return entry.value
+
+    def set(self, key: str, value: Any):
+        blob = self._pack(value)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now, now)
+        )
+        self._evict()
+
+    def touch(self, key: str):
+        """Продлевает жизнь записи (например, после ответа 304 Not Modified)."""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE entries SET created_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+        )
+
+    def delete(self, key: str):
+        self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        self._connect().execute("DELETE FROM entries")
+
+    def claim(self, key: str, owner: str, ttl: float) -> bool:
+        """
+        Захват ключа на ttl секунд (например, «корпус темы собирается») — общий для
+        всех процессов, работающих с этим файлом. False — ключ уже захвачен другим
+        владельцем и захват не истёк.
+        """
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM claims WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                conn.execute("COMMIT")
+                return False
+            conn.execute("INSERT OR REPLACE INTO claims (key, owner, expires_at) VALUES (?, ?, ?)",
+                         (key, owner, now + ttl))
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def is_claimed(self, key: str) -> bool:
+        row = self._connect().execute("SELECT expires_at FROM claims WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def release(self, key: str, owner: str):
+        self._connect().execute("DELETE FROM claims WHERE key = ? AND owner = ?", (key, owner))
+
+    def total_size(self) -> int:
+        return self._connect().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return
+
+        # Вытесняем давно не использованные записи до 90% лимита,
+        # чтобы не чистить кэш на каждой вставке
+        target = int(self.max_bytes * 0.9)
+        conn = self._connect()
+        removed = 0
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+            if total <= target:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        logging.info(f"[SqliteStore] Вытеснено {removed} записей из {os.path.basename(self.path)}")
@@ -1,45 +1,80 @@
 # fact_collector.py
 # tools/collectors/fact_collector.py
 
+import re
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
 from tools.parsers.google_parser import parse_google_results
-from tools.parsers.article_parser import get_article_html, parse_article_content
+from tools.parsers.article_parser import fetch_text_batch
 
-from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
 from langchain.chains import LLMChain
 
+from agents.llm_factory import build_chat_llm
+from tools.tokens import chunk_by_tokens
+from tools.filters.dedup import deduplicate
+from tools.metrics import timed
+
+# Бюджет токенов для extract_facts (map-reduce по кускам корпуса)
+CHUNK_TOKENS = 3000          # жёсткий потолок контекста на один вызов LLM
+MAX_TOTAL_TOKENS = 18000     # потолок контекста на весь запрос (всё сверх — отбрасывается)
+MAP_CONCURRENCY = 4          # сколько кусков обрабатываем параллельно
+MAX_FACTS = 5                # сколько фактов возвращаем после слияния
+
+# Порог сходства для удаления почти-дубликатов в collect_raw_facts (None — не удалять)
+DEDUP_THRESHOLD = 0.8
+
 
 def fetch_articles_from_xmlriver(theme: str, limit: int = 6) -> list[str]:
     """
     Получает заголовки из Google XMLriver и парсит содержимое статей.
     Возвращает список очищенных текстов для дальнейшего анализа.
     """
-    headlines = parse_google_results(query=theme)
-    texts = []
-
-    for item in headlines:
-        url = item["url"]
-        try:
-            html = get_article_html(url)
-            if html:
-                parsed = parse_article_content(html)
-                if parsed:
-                    texts.append(parsed.strip())
-        except Exception as e:
-            logging.warning(f"[FactCollector] Ошибка при обработке URL {url}: {e}")
+    with timed("serp"):
+        headlines = parse_google_results(query=theme)
+    urls = [item["url"] for item in headlines]
+    with timed("fetch", urls=len(urls)):
+        pages = fetch_text_batch(urls)
+    texts = [text for text in pages.values() if text]
 
     return texts
 
 
+def _fact_key(fact: str) -> str:
+    return re.sub(r"[\W_]+", " ", fact.lower()).strip()
+
+
+def _merge_facts(per_chunk: list[list[str]], max_facts: int) -> list[str]:
+    """
+    Reduce-шаг: чередуем факты из разных кусков (первый из каждого, затем второй...),
+    отбрасываем повторы и останавливаемся на max_facts.
+    """
+    merged = []
+    seen = set()
+    for rank in range(max((len(facts) for facts in per_chunk), default=0)):
+        for facts in per_chunk:
+            if rank >= len(facts):
+                continue
+            key = _fact_key(facts[rank])
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(facts[rank])
+                if len(merged) >= max_facts:
+                    return merged
+    return merged
+
+
 class FactCollector:
     """
     Инструмент сбора релевантных фактов по подзаголовку из набора текстов.
     Используется агентами генерации и редактуры.
     """
 
-    def __init__(self, model_name="gpt-4"):
-        self.llm = ChatOpenAI(model_name=model_name, temperature=0.2)
+    def __init__(self, model_name="gpt-4", use_cache=True):
+        self.model_name = model_name
+        self.llm = build_chat_llm(model_name=model_name, temperature=0.2, use_cache=use_cache)
 
         self.system_prompt = """
 Ты — аналитик. Изучи представленные тексты и выдели 3–5 кратких, важных и проверяемых фактов,
@@ -61,23 +96,48 @@ class FactCollector:
             SystemMessagePromptTemplate.from_template(self.system_prompt),
             HumanMessagePromptTemplate.from_template(self.human_prompt)
         ])
+        self.chain = LLMChain(llm=self.llm, prompt=self.prompt)
 
-    def extract_facts(self, full_texts: list[str], subheading: str) -> list[str]:
+    def extract_facts(self, full_texts: list[str], subheading: str,
+                      chunk_tokens: int = CHUNK_TOKENS, max_total_tokens: int = MAX_TOTAL_TOKENS,
+                      max_facts: int = MAX_FACTS) -> list[str]:
         """
         Прогоняет собранные тексты через LLM и возвращает отфильтрованные факты.
         (по умолчанию 3-5 шт.)
+
+        Map: корпус режется на куски не длиннее chunk_tokens (но не больше max_total_tokens
+        суммарно), куски обрабатываются параллельно.
+        Reduce: факты из всех кусков объединяются локально, без LLM — дубли убираются,
+        куски чередуются, чтобы ни один источник не вытеснил остальные.
         """
-        combined_text = "\n\n".join(full_texts)
-        chain = LLMChain(llm=self.llm, prompt=self.prompt)
-        result = chain.run({"context": combined_text, "subheading": subheading})
-        return [line.strip("-• ").strip() for line in result.strip().split("\n") if line.strip()]
+        chunks = chunk_by_tokens(full_texts, chunk_tokens, max_total_tokens, model_name=self.model_name)
+        if not chunks:
+            return []
+
+        logging.info(f"[FactCollector] Извлечение фактов для «{subheading}»: {len(chunks)} кусков по ≤{chunk_tokens} токенов")
+
+        def map_chunk(chunk: str) -> list[str]:
+            try:
+                result = self.chain.run({"context": chunk, "subheading": subheading})
+            except Exception as e:
+                logging.warning(f"[FactCollector] Ошибка обработки куска: {e}")
+                return []
+            return [line.strip("-• ").strip() for line in result.strip().split("\n") if line.strip()]
+
+        with ThreadPoolExecutor(max_workers=min(MAP_CONCURRENCY, len(chunks))) as executor:
+            futures = [executor.submit(contextvars.copy_context().run, map_chunk, chunk) for chunk in chunks]
+            per_chunk = [future.result() for future in futures]
+
+        return _merge_facts(per_chunk, max_facts)
 
     # --- NEW CODE ---
-    def collect_raw_facts(self, full_texts: list[str]) -> list[str]:
+    def collect_raw_facts(self, full_texts: list[str], dedup_threshold: float | None = DEDUP_THRESHOLD) -> list[str]:
         """
         Собирает "сырые" факты/фрагменты напрямую без сильной фильтрации.
         - Просто берём каждый блок текста и разбиваем его на предложения ~<= 2-3 строки,
           чтобы потом FactFilter мог с ними работать.
+        - Почти-дубликаты (перепечатки одного текста на разных сайтах) удаляются
+          через MinHash/LSH, если задан dedup_threshold.
         """
         logging.info("[FactCollector] Сбор 'сырых' фактов (без жёсткого лимита).")
         raw_facts = []
@@ -88,4 +148,9 @@ class FactCollector:
                 block = block.strip()
                 if len(block) > 20:  # примитивная проверка, чтобы отбросить пустое
                     raw_facts.append(block)
+
+        if dedup_threshold is not None and raw_facts:
+            total = len(raw_facts)
+            raw_facts, removed = deduplicate(raw_facts, threshold=dedup_threshold)
+            logging.info(f"[FactCollector] Удалено почти-дубликатов: {removed} из {total}")
         return raw_facts
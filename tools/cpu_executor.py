@@ -0,0 +1,155 @@
+# tools/cpu_executor.py
+
+"""
+Пул процессов для CPU-работы: разбор HTML (parse_article_content) и очистка
+текста spaCy (clean_texts). В потоках эта работа держит GIL и тормозит потоки,
+которые только ждут сеть; в отдельных процессах она масштабируется по ядрам.
+
+Каждый процесс пула при старте один раз загружает spaCy и модули парсера.
+Между процессами передаются zlib-сжатые байты (HTML и тексты), а не объекты.
+
+CPU_WORKERS — размер пула (по умолчанию min(4, число ядер - 1)); 0 — всё выполняется
+в вызывающем потоке, как раньше. При сбое пула работа тоже выполняется на месте.
+
+Память: процессы пула не делят модель spaCy с родителем (forkserver), так что каждый
+держит свою копию — плюс CPU_WORKERS моделей на каждый процесс, создавший пул
+(под gunicorn — на каждый воркер). Поэтому gunicorn.conf.py по умолчанию ставит
+CPU_WORKERS=1: один процесс на воркер убирает spaCy из потоков пайплайна, а модель
+в памяти — по одной лишней копии на воркер.
+"""
+
+import os
+import json
+import zlib
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Импорт регистрирует ресурс spacy_ru — его предзагружает warmup() в мастер-процессе
+from tools.filters import text_cleaner
+
+# По умолчанию одно ядро остаётся процессу с потоками ввода-вывода; на одноядерной машине пул не нужен
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, (os.cpu_count() or 1) - 1))))
+# Тексты для очистки режутся на пачки такого размера и раздаются процессам параллельно
+CLEAN_CHUNK = 64
+# С какого числа текстов очистка уходит в пул. Пул постоянный и уже прогрет, передача
+# пачки статьи (~40 абзацев) туда и обратно — меньше 1 мс, а spaCy тратит миллисекунды
+# на каждый абзац, поэтому в пул уходит любая непустая пачка (порог CLEAN_PROCESS_THRESHOLD
+# в text_cleaner — для spacy n_process, который каждый раз запускает процессы заново)
+CLEAN_POOL_MIN_TEXTS = int(os.getenv("CLEAN_POOL_MIN_TEXTS", "1"))
+# Уровень zlib: 1 — почти без затрат CPU, HTML всё равно сжимается в 4–6 раз
+COMPRESS_LEVEL = 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _pack(value) -> bytes:
+    data = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return zlib.compress(data.encode("utf-8"), COMPRESS_LEVEL)
+
+
+def _unpack_text(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _unpack_list(blob: bytes) -> list:
+    return json.loads(_unpack_text(blob))
+
+
+# --- функции, выполняемые в процессах пула ---
+
+def _init_worker():
+    """Предзагрузка состояния процесса: парсер и модель spaCy."""
+    import tools.parsers.article_parser  # noqa: F401 — lxml, bs4 и бэкенды извлечения
+    from tools.filters.text_cleaner import get_nlp
+
+    try:
+        get_nlp()
+    except Exception as e:
+        # Без модели разбор HTML всё равно работает, очистка упадёт при вызове
+        logging.warning(f"[cpu_executor] spaCy не загружена в процессе {os.getpid()}: {e}")
+
+
+def _parse_job(html_blob: bytes, backend: str | None) -> bytes:
+    from tools.parsers.article_parser import parse_article_content
+    return _pack(parse_article_content(_unpack_text(html_blob), backend=backend))
+
+
+def _clean_job(texts_blob: bytes) -> bytes:
+    from tools.filters.text_cleaner import clean_texts
+    return _pack(clean_texts(_unpack_list(texts_blob), n_process=1))
+
+
+# --- интерфейс для вызывающего кода ---
+
+def get_cpu_pool() -> ProcessPoolExecutor | None:
+    """Пул создаётся при первом обращении (в воркере gunicorn — уже после fork)."""
+    global _pool
+    if CPU_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # forkserver: процессы пула не наследуют потоки и блокировки родителя
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS, initializer=_init_worker,
+                                            mp_context=multiprocessing.get_context(method))
+                logging.info(f"[cpu_executor] Пул процессов: {CPU_WORKERS} ({method})")
+    return _pool
+
+
+def _reset_pool(error: Exception):
+    global _pool
+    logging.warning(f"[cpu_executor] Пул процессов недоступен, выполняем на месте: {error}")
+    with _pool_lock:
+        _pool = None
+
+
+def parse_html(html: str, backend: str | None = None) -> str:
+    """parse_article_content в пуле процессов."""
+    from tools.parsers.article_parser import parse_article_content
+
+    pool = get_cpu_pool()
+    if pool is None:
+        return parse_article_content(html, backend=backend)
+    try:
+        return _unpack_text(pool.submit(_parse_job, _pack(html), backend).result())
+    except BrokenProcessPool as e:
+        _reset_pool(e)
+        return parse_article_content(html, backend=backend)
+
+
+async def aparse_html(html: str, backend: str | None = None) -> str:
+    """parse_html для event loop: ожидание результата не занимает поток."""
+    pool = get_cpu_pool()
+    if pool is None:
+        return await asyncio.to_thread(parse_html, html, backend)
+    try:
+        return _unpack_text(await asyncio.wrap_future(pool.submit(_parse_job, _pack(html), backend)))
+    except BrokenProcessPool as e:
+        _reset_pool(e)
+        return await asyncio.to_thread(parse_html, html, backend)
+
+
+def clean_texts(texts: list[str]) -> list[str]:
+    """
+    clean_texts (tools/filters/text_cleaner.py) в пуле процессов: пачка статьи уходит
+    одной задачей, большие пачки режутся на куски по CLEAN_CHUNK и чистятся параллельно;
+    порядок результатов сохраняется. Вызывающий поток в это время не держит GIL.
+    """
+    if len(texts) < CLEAN_POOL_MIN_TEXTS:
+        return text_cleaner.clean_texts(texts)
+    pool = get_cpu_pool()
+    if pool is None:
+        return text_cleaner.clean_texts(texts)
+    try:
+        futures = [pool.submit(_clean_job, _pack(texts[i:i + CLEAN_CHUNK]))
+                   for i in range(0, len(texts), CLEAN_CHUNK)]
+        return [text for future in futures for text in _unpack_list(future.result())]
+    except BrokenProcessPool as e:
+        _reset_pool(e)
+        return text_cleaner.clean_texts(texts)
@@ -0,0 +1,117 @@
+# tools/filters/dedup.py
+
+"""
+Поиск почти-дубликатов абзацев: MinHash по словесным шинглам + LSH (banding).
+Время работы линейно по числу абзацев: точно (по Жаккару) сравниваются
+только абзацы, попавшие в одну LSH-корзину.
+"""
+
+import re
+import random
+import hashlib
+
+_WORD_RE = re.compile(r"\w+")
+_MASK64 = (1 << 64) - 1
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 3
+
+
+def _shingles(text: str, size: int) -> set[bytes]:
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return set()
+    size = min(size, len(words))
+    return {" ".join(words[i:i + size]).encode("utf-8") for i in range(len(words) - size + 1)}
+
+
+def _hash_shingle(shingle: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """
+    MinHash-сигнатуры: 64-битный хэш шингла прогоняется через num_perm
+    хэш-функций вида multiply-shift ((a·x + b) mod 2^64) >> 32.
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.params = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(num_perm)]
+
+    def signature(self, shingles: set[bytes]) -> tuple[int, ...]:
+        hashes = [_hash_shingle(s) for s in shingles]
+        return tuple(min(((a * h + b) & _MASK64) >> 32 for h in hashes) for a, b in self.params)
+
+
+def optimal_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """
+    Подбирает (число полос, строк в полосе) так, чтобы порог срабатывания LSH
+    (1/b)^(1/r) был как можно ближе к threshold.
+    """
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def deduplicate(texts: list[str], threshold: float = DEFAULT_THRESHOLD, num_perm: int = DEFAULT_NUM_PERM,
+                shingle_size: int = DEFAULT_SHINGLE_SIZE) -> tuple[list[str], int]:
+    """
+    Удаляет абзацы, похожие (по коэффициенту Жаккара на шинглах) на уже встреченные.
+    Сохраняется первое вхождение, порядок не меняется.
+
+    :param threshold: порог сходства от 0 до 1 (1.0 — только точные совпадения шинглов)
+    :return: (оставшиеся абзацы, сколько удалено)
+    """
+    hasher = MinHasher(num_perm)
+    # Порог LSH ставим чуть ниже целевого: лишние кандидаты отсеются
+    # точной проверкой, а пропуски дубликатов — нет
+    bands, rows = optimal_bands(num_perm, threshold * 0.85)
+    buckets: list[dict] = [{} for _ in range(bands)]
+    kept = []
+    removed = 0
+
+    for text in texts:
+        shingles = _shingles(text, shingle_size)
+        if not shingles:
+            kept.append((text, shingles))
+            continue
+
+        signature = hasher.signature(shingles)
+        band_keys = [signature[i * rows:(i + 1) * rows] for i in range(bands)]
+
+        duplicate = False
+        checked = set()
+        for band, key in zip(buckets, band_keys):
+            for candidate in band.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                # Кандидатов из LSH проверяем точно — по Жаккару на шинглах
+                other = kept[candidate][1]
+                similarity = len(shingles & other) / len(shingles | other)
+                if similarity >= threshold:
+                    duplicate = True
+                    break
+            if duplicate:
+                break
+
+        if duplicate:
+            removed += 1
+            continue
+
+        index = len(kept)
+        kept.append((text, shingles))
+        for band, key in zip(buckets, band_keys):
+            band.setdefault(key, []).append(index)
+
+    return [text for text, _ in kept], removed
@@ -0,0 +1,152 @@
+# tools/filters/fact_router.py
+
+"""
+Локальная маршрутизация «сырых» фактов по подзаголовкам (BM25 по основам слов).
+Заменяет распределение фактов силами LLM: в FactFilter уходят только
+top-k кандидатов на каждый подзаголовок.
+"""
+
+import math
+import re
+import functools
+from collections import Counter
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r"[а-яёa-z0-9]+", re.IGNORECASE)
+
+STOPWORDS = {
+    "и", "в", "во", "не", "что", "он", "на", "я", "с", "со", "как", "а", "то", "все", "она", "так",
+    "его", "но", "да", "ты", "к", "у", "же", "вы", "за", "бы", "по", "только", "ее", "мне", "было",
+    "вот", "от", "меня", "еще", "нет", "о", "из", "ему", "теперь", "когда", "даже", "ну", "ли",
+    "если", "уже", "или", "ни", "быть", "был", "него", "до", "вас", "нибудь", "опять", "уж", "вам",
+    "ведь", "там", "потом", "себя", "ничего", "ей", "может", "они", "тут", "где", "есть", "надо",
+    "ней", "для", "мы", "тебя", "их", "чем", "была", "сам", "чтоб", "без", "будто", "чего", "раз",
+    "тоже", "себе", "под", "будет", "ж", "тогда", "кто", "этот", "того", "потому", "этого", "какой",
+    "совсем", "ним", "здесь", "этом", "один", "почти", "мой", "тем", "чтобы", "нее", "были", "куда",
+    "зачем", "всех", "никогда", "можно", "при", "наконец", "два", "об", "другой", "хоть", "после",
+    "над", "больше", "тот", "через", "эти", "нас", "про", "всего", "них", "какая", "много", "разве",
+    "три", "эту", "моя", "впрочем", "хорошо", "свою", "этой", "перед", "иногда", "лучше", "чуть",
+    "том", "нельзя", "такой", "им", "более", "всегда", "конечно", "всю", "между", "это", "также"
+}
+
+# Окончания для стеммера Портера (Snowball) для русского языка.
+# Окончания первой группы отрезаются, только если перед ними стоит «а» или «я».
+_PERFECTIVE_GERUND = (("вшись", "вши", "в"), ("ившись", "ывшись", "ивши", "ывши", "ив", "ыв"))
+_REFLEXIVE = ((), ("ся", "сь"))
+_ADJECTIVE = ((), ("ими", "ыми", "его", "ого", "ему", "ому", "ее", "ие", "ые", "ое", "ей", "ий", "ый",
+                   "ой", "ем", "им", "ым", "ом", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею"))
+_PARTICIPLE = (("ем", "нн", "вш", "ющ", "щ"), ("ивш", "ывш", "ующ"))
+_VERB = (("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно"),
+         ("ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл", "им", "ым", "ен",
+          "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю"))
+_NOUN = ((), ("иями", "ями", "ами", "ией", "иям", "ием", "иях", "ев", "ов", "ие", "ье", "еи", "ии", "ей",
+              "ой", "ий", "ям", "ем", "ам", "ом", "ах", "ях", "ию", "ью", "ия", "ья", "а", "е", "и", "й",
+              "о", "у", "ы", "ь", "ю", "я"))
+_SUPERLATIVE = ((), ("ейше", "ейш"))
+_DERIVATIONAL = ((), ("ость", "ост"))
+_VOWELS = set("аеиоуыэюя")
+
+
+def _strip(word: str, groups: tuple) -> str | None:
+    """Отрезает самое длинное подходящее окончание; None — если ничего не подошло."""
+    group1, group2 = groups
+    candidates = [(ending, True) for ending in group1] + [(ending, False) for ending in group2]
+    for ending, needs_a in sorted(candidates, key=lambda item: len(item[0]), reverse=True):
+        if not word.endswith(ending):
+            continue
+        stem_part = word[:-len(ending)]
+        if needs_a and not stem_part.endswith(("а", "я")):
+            continue
+        return stem_part
+    return None
+
+
+@functools.lru_cache(maxsize=100_000)
+def stem(word: str) -> str:
+    """Стеммер Портера для русского языка (правила Snowball, без региона R2)."""
+    word = word.lower().replace("ё", "е")
+    rv_start = next((i + 1 for i, ch in enumerate(word) if ch in _VOWELS), len(word))
+    prefix, rv = word[:rv_start], word[rv_start:]
+    if not rv:
+        return word
+
+    stripped = _strip(rv, _PERFECTIVE_GERUND)
+    if stripped is None:
+        rv = _strip(rv, _REFLEXIVE) or rv
+        adjective = _strip(rv, _ADJECTIVE)
+        if adjective is not None:
+            rv = _strip(adjective, _PARTICIPLE) or adjective
+        else:
+            verb = _strip(rv, _VERB)
+            rv = verb if verb is not None else (_strip(rv, _NOUN) or rv)
+    else:
+        rv = stripped
+
+    if rv.endswith("и"):
+        rv = rv[:-1]
+    derived = _strip(rv, _DERIVATIONAL)
+    if derived:
+        rv = derived
+    rv = _strip(rv, _SUPERLATIVE) or rv
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    elif rv.endswith("ь"):
+        rv = rv[:-1]
+    return prefix + rv
+
+
+def tokenize(text: str) -> list[str]:
+    return [stem(word) for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS and len(word) > 1]
+
+
+class BM25Index:
+    """Индекс Okapi BM25 над списком документов (фактов)."""
+
+    def __init__(self, documents: list[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = [Counter(tokenize(doc)) for doc in documents]
+        self.doc_lengths = [sum(terms.values()) for terms in self.doc_terms]
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+        doc_freq = Counter()
+        for terms in self.doc_terms:
+            doc_freq.update(terms.keys())
+        n = len(documents)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+    def scores(self, query: str) -> list[float]:
+        query_terms = set(tokenize(query))
+        result = []
+        for terms, length in zip(self.doc_terms, self.doc_lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            result.append(score)
+        return result
+
+
+def route_facts(raw_facts: list[str], headlines: list[str], top_k: int = 8, theme: str = "") -> dict[str, list[str]]:
+    """
+    Для каждого подзаголовка отбирает top_k наиболее релевантных фактов.
+
+    :param theme: общая тема статьи — добавляется к запросу, чтобы короткие H2
+                  не оставались без кандидатов (слова подзаголовка при этом весят вдвое больше)
+    :return: {подзаголовок: [факты в порядке убывания релевантности]}
+    """
+    if not raw_facts:
+        return {headline: [] for headline in headlines}
+
+    index = BM25Index(raw_facts)
+    routed = {}
+    for headline in headlines:
+        query = f"{headline} {headline} {theme}" if theme else headline
+        scores = index.scores(query)
+        ranked = sorted(range(len(raw_facts)), key=lambda i: scores[i], reverse=True)
+        routed[headline] = [raw_facts[i] for i in ranked[:top_k] if scores[i] > 0]
+    return routed
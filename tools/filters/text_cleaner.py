@@ -1,9 +1,42 @@
 # tools/filters/text_cleaner.py
 
-import spacy
+import os
 import re
 
-nlp = spacy.load("ru_core_news_sm")
+from tools import resources
+
+SPACY_MODEL = "ru_core_news_sm"
+
+# Для поиска лемм синтаксический разбор и NER не нужны —
+# лемматизатору достаточно tok2vec + morphologizer + attribute_ruler
+DISABLED_PIPES = ["parser", "ner"]
+
+CLEAN_BATCH_SIZE = 64
+# Сколько процессов использовать для больших пачек (1 — без пула процессов)
+CLEAN_N_PROCESS = int(os.getenv("CLEAN_N_PROCESS", "1"))
+# Начиная с какого числа текстов имеет смысл запускать пул процессов
+CLEAN_PROCESS_THRESHOLD = 200
+
+
+def _load_spacy():
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+
+resources.register("spacy_ru", _load_spacy)
+
+
+def get_nlp():
+    """Модель spaCy загружается при первом обращении, а не при импорте модуля."""
+    return resources.get("spacy_ru")
+
+
+def __getattr__(name):
+    # Обратная совместимость: text_cleaner.nlp
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(name)
+
 
 # Расширенный словарь Ильяхова-style
 BLACKLIST = {
@@ -40,8 +73,7 @@ PHRASE_PATTERNS = [
 ]
 
 
-def clean_text(text: str) -> str:
-    doc = nlp(text)
+def _rewrite_doc(doc) -> str:
     new_tokens = []
 
     for token in doc:
@@ -61,3 +93,26 @@ def clean_text(text: str) -> str:
     # Удалим лишние пробелы
     clean_sentence = re.sub(r"\s{2,}", " ", clean_sentence)
     return clean_sentence.strip()
+
+
+def clean_texts(texts: list[str], batch_size: int = CLEAN_BATCH_SIZE, n_process: int | None = None) -> list[str]:
+    """
+    Пакетная очистка: все тексты проходят через spaCy за один проход nlp.pipe.
+    Порядок результатов совпадает с порядком входных текстов.
+
+    :param n_process: число процессов для больших пачек
+                      (по умолчанию CLEAN_N_PROCESS, пул включается от CLEAN_PROCESS_THRESHOLD текстов)
+    """
+    if not texts:
+        return []
+
+    n_process = n_process or CLEAN_N_PROCESS
+    if len(texts) < CLEAN_PROCESS_THRESHOLD:
+        n_process = 1
+
+    docs = get_nlp().pipe(texts, disable=DISABLED_PIPES, batch_size=batch_size, n_process=n_process)
+    return [_rewrite_doc(doc) for doc in docs]
+
+
+def clean_text(text: str) -> str:
+    return clean_texts([text])[0]
@@ -0,0 +1,165 @@
+# tools/metrics.py
+
+"""
+Метрики пайплайна: время по стадиям, токены и стоимость вызовов LLM.
+
+Каждое измерение пишется в лог структурной записью "[Metrics] {json}"
+и накапливается в реестре процесса, который отдаётся в формате Prometheus
+(маршрут /metrics в app.py). Под gunicorn у каждого воркера свой реестр.
+
+Стадия задаётся через timed(...) и хранится в contextvar, поэтому вызов LLM
+внутри стадии (в том числе в потоках пайплайна) попадает в метрики с её именем.
+"""
+
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+PREFIX = "content_factory"
+
+# Цены, $ за 1M токенов (prompt, completion)
+MODEL_PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+METRIC_HELP = {
+    "stage_seconds": ("summary", "Время стадий пайплайна, с"),
+    "llm_calls_total": ("counter", "Вызовы LLM (без попаданий в кэш)"),
+    "llm_seconds": ("summary", "Время вызовов LLM, с"),
+    "llm_tokens_total": ("counter", "Токены LLM по типу (prompt/completion)"),
+    "llm_cost_usd_total": ("counter", "Оценка стоимости вызовов LLM, $"),
+}
+
+_stage = contextvars.ContextVar("metrics_stage", default="")
+
+
+def current_stage() -> str:
+    return _stage.get()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        # gpt-4o-2024-08-06 → gpt-4o и т.п.: берём самый длинный известный префикс
+        known = [name for name in MODEL_PRICES if model.startswith(name)]
+        prices = MODEL_PRICES[max(known, key=len)] if known else None
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: dict[tuple, float] = {}
+        self.summaries: dict[tuple, list[float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            summary = self.summaries.setdefault(key, [0.0, 0])
+            summary[0] += value
+            summary[1] += 1
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus (exposition format 0.0.4)."""
+        def fmt_labels(labels: tuple) -> str:
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+        with self.lock:
+            counters = dict(self.counters)
+            summaries = {key: list(value) for key, value in self.summaries.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRIC_HELP.items():
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            if kind == "counter":
+                for (key_name, labels), value in sorted(counters.items()):
+                    if key_name == name:
+                        lines.append(f"{metric}{fmt_labels(labels)} {value:g}")
+            else:
+                for (key_name, labels), (total, count) in sorted(summaries.items()):
+                    if key_name == name:
+                        lines.append(f"{metric}_sum{fmt_labels(labels)} {total:.6f}")
+                        lines.append(f"{metric}_count{fmt_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def log_record(event: str, **fields):
+    logging.info(f"[Metrics] {json.dumps({'event': event, **fields}, ensure_ascii=False)}")
+
+
+@contextmanager
+def timed(stage: str, log: bool = True, **fields):
+    """
+    Замеряет время блока как стадию stage.
+    :param log: False — только в реестр (для частых событий, например парсинга каждой страницы)
+    :param fields: дополнительные поля структурной записи (в метки Prometheus не попадают)
+    """
+    token = _stage.set(stage)
+    started = time.monotonic()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _stage.reset(token)
+        observe_stage(stage, time.monotonic() - started, log=log, **fields, **({"error": error} if error else {}))
+
+
+def observe_stage(stage: str, seconds: float, log: bool = True, **fields):
+    """Учитывает уже замеренную стадию (когда блок нельзя обернуть в timed, например генератор)."""
+    registry.observe("stage_seconds", seconds, stage=stage)
+    if log:
+        log_record("stage", stage=stage, seconds=round(seconds, 3), **fields)
+
+
+def record_llm_call(model: str, prompt_tokens: int | None, completion_tokens: int | None, seconds: float):
+    """Учитывает один реальный (не из кэша) вызов LLM в текущей стадии."""
+    stage = current_stage() or "other"
+    prompt_tokens, completion_tokens = prompt_tokens or 0, completion_tokens or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    registry.inc("llm_calls_total", stage=stage, model=model)
+    registry.observe("llm_seconds", seconds, stage=stage, model=model)
+    registry.inc("llm_tokens_total", prompt_tokens, stage=stage, model=model, kind="prompt")
+    registry.inc("llm_tokens_total", completion_tokens, stage=stage, model=model, kind="completion")
+    if cost is not None:
+        registry.inc("llm_cost_usd_total", cost, stage=stage, model=model)
+
+    log_record("llm_call", stage=stage, model=model, seconds=round(seconds, 3),
+               prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+               cost_usd=round(cost, 6) if cost is not None else None)
+
+
+def render_prometheus() -> str:
+    return registry.render()
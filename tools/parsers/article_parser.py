@@ -1,34 +1,214 @@
 # tools/parsers/article_parser.py
 
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
-from fake_useragent import UserAgent
+
+from tools import resources, cpu_executor
+from tools.cache.page_cache import get_page_cache, conditional_headers
+from tools.metrics import timed
 
 HEADERS = {
-    "User-Agent": UserAgent().chrome,
     "Accept-Language": "ru,en;q=0.8",
     "Accept-Encoding": "gzip, deflate, br",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp",
     "Connection": "keep-alive"
 }
 
+# Параметры пакетной загрузки
+FETCH_MAX_WORKERS = 8        # сколько страниц качаем одновременно
+FETCH_PER_HOST_LIMIT = 2     # не больше N одновременных соединений к одному хосту
+FETCH_BATCH_DEADLINE = 15.0  # общий лимит на всю пачку, сек
+
+# Бэкенд извлечения текста: lxml | trafilatura | bs4
+PARSER_BACKEND = os.getenv("ARTICLE_PARSER_BACKEND", "lxml")
+
+
+def _load_user_agent() -> str:
+    from fake_useragent import UserAgent
+    return UserAgent().chrome
+
+
+resources.register("user_agent", _load_user_agent)
+
+_session = None
+_session_lock = threading.Lock()
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    Общая сессия с пулом соединений: TCP/TLS переиспользуются между запросами.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=32, pool_maxsize=FETCH_PER_HOST_LIMIT * 4)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(HEADERS)
+                session.headers["User-Agent"] = resources.get("user_agent")
+                _session = session
+    return _session
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlparse(url).netloc.lower()
+    with _host_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(FETCH_PER_HOST_LIMIT)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def _load_page(url: str, timeout: int, with_text: bool = False) -> dict | None:
+    """
+    Возвращает запись о странице {"html", "text", "etag", "last_modified"}.
+    Свежая запись берётся из кэша без сети; устаревшая — ревалидируется
+    условным запросом (ETag / Last-Modified), при 304 тело не скачивается.
+    """
+    cache = get_page_cache()
+    entry = cache.lookup(url)
+    if entry is not None and not entry.expired:
+        page = entry.value
+    else:
+        extra_headers = conditional_headers(entry.value) if entry is not None else {}
+        try:
+            with _host_semaphore(url):
+                response = _get_session().get(url, headers=extra_headers, timeout=timeout)
+            if response.status_code == 304 and entry is not None:
+                cache.touch(url)
+                page = entry.value
+            else:
+                response.raise_for_status()
+                page = {
+                    "html": response.text,
+                    "text": None,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                }
+                if not with_text:
+                    cache.set(url, page)
+        except Exception as e:
+            print(f"[article_parser] Ошибка при запросе {url}: {e}")
+            return None
+
+    if with_text and page.get("text") is None:
+        with timed("parse", log=False):
+            # Разбор — в пуле процессов (tools/cpu_executor.py), чтобы не держать GIL в потоках загрузки
+            page["text"] = cpu_executor.parse_html(page["html"]).strip()
+        cache.set(url, page)
+    return page
+
 
 def get_article_html(url: str, timeout: int = 10) -> str:
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=timeout)
-        response.raise_for_status()
-        return response.text
-    except Exception as e:
-        print(f"[article_parser] Ошибка при запросе {url}: {e}")
-        return ""
+    page = _load_page(url, timeout)
+    return page["html"] if page else ""
+
+
+def get_article_text(url: str, timeout: int = 10) -> str:
+    """
+    Текст статьи по URL. При попадании в кэш не трогает ни сеть, ни HTML-парсер.
+    """
+    page = _load_page(url, timeout, with_text=True)
+    return page["text"] if page else ""
 
 
-def parse_article_content(html: str) -> str:
+def _run_batch(fetch, urls: list[str], timeout: int, deadline: float, max_workers: int) -> dict[str, str]:
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return {}
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(urls)), thread_name_prefix="fetch")
+    futures = {executor.submit(fetch, url, timeout): url for url in urls}
+    done, not_done = wait(futures, timeout=deadline)
+    # Не ждём «хвост»: отменяем ещё не начатые загрузки и сразу возвращаем готовое
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    pages = {}
+    for future in done:
+        url = futures[future]
+        try:
+            result = future.result()
+        except Exception as e:
+            logging.warning(f"[article_parser] Ошибка при обработке URL {url}: {e}")
+            continue
+        if result:
+            pages[url] = result
+
+    if not_done:
+        logging.warning(f"[article_parser] Не уложились в {deadline} с: пропущено {len(not_done)} из {len(urls)} URL")
+    logging.info(f"[article_parser] Загружено {len(pages)}/{len(urls)} страниц за {time.monotonic() - started:.1f} с")
+
+    # Сохраняем исходный порядок URL (порядок выдачи)
+    return {url: pages[url] for url in urls if url in pages}
+
+
+def fetch_html_batch(urls: list[str], timeout: int = 10,
+                     deadline: float = FETCH_BATCH_DEADLINE,
+                     max_workers: int = FETCH_MAX_WORKERS) -> dict[str, str]:
+    """
+    Параллельно скачивает страницы через общую сессию.
+    Возвращает {url: html} только для тех страниц, что успели загрузиться
+    до общего дедлайна; медленные сайты не задерживают всю пачку.
+    """
+    return _run_batch(get_article_html, urls, timeout, deadline, max_workers)
+
+
+def fetch_text_batch(urls: list[str], timeout: int = 10,
+                     deadline: float = FETCH_BATCH_DEADLINE,
+                     max_workers: int = FETCH_MAX_WORKERS) -> dict[str, str]:
+    """
+    То же, что fetch_html_batch, но сразу возвращает {url: извлечённый текст}
+    (с кэшированием результата parse_article_content).
+    """
+    return _run_batch(get_article_text, urls, timeout, deadline, max_workers)
+
+
+def parse_article_content(html: str, backend: str | None = None) -> str:
     """
     Извлекает важное содержимое из HTML-страницы:
     абзацы, списки, цитаты, таблицы — в логичном порядке.
+
+    :param backend: "lxml" — потоковый однопроходный экстрактор (tools/parsers/fast_extractor.py),
+                    "trafilatura" — извлечение основного текста trafilatura,
+                    "bs4" — исходный разбор BeautifulSoup.
+                    По умолчанию — PARSER_BACKEND. При ошибке бэкенда используется bs4.
     """
+    backend = backend or PARSER_BACKEND
+    if backend != "bs4":
+        try:
+            return PARSER_BACKENDS[backend](html)
+        except Exception as e:
+            logging.warning(f"[article_parser] Бэкенд '{backend}' не справился, используем bs4: {e}")
+    return _parse_with_bs4(html)
+
+
+def _parse_with_lxml(html: str) -> str:
+    from tools.parsers.fast_extractor import extract_text
+    return extract_text(html)
+
+
+def _parse_with_trafilatura(html: str) -> str:
+    import trafilatura
+
+    text = trafilatura.extract(html, include_tables=True, include_comments=False) or ""
+    return "\n\n".join(line.strip() for line in text.split("\n") if line.strip())
+
+
+def _parse_with_bs4(html: str) -> str:
     soup = BeautifulSoup(html, "html.parser")
     body = soup.find("body")
 
@@ -61,3 +241,10 @@ def parse_article_content(html: str) -> str:
                     content_parts.append(" | ".join(cols))
 
     return "\n\n".join(content_parts)
+
+
+PARSER_BACKENDS = {
+    "lxml": _parse_with_lxml,
+    "trafilatura": _parse_with_trafilatura,
+    "bs4": _parse_with_bs4
+}
@@ -0,0 +1,110 @@
+# tools/parsers/async_fetch.py
+
+"""
+Асинхронная загрузка страниц через httpx для services/async_pipeline.py.
+Поведение как у fetch_text_batch (tools/parsers/article_parser.py): общий кэш страниц
+с условными запросами, лимит соединений на хост, общий дедлайн на пачку.
+Разбор HTML уходит из event loop в пул процессов (tools/cpu_executor.py),
+обращения к SQLite-кэшу страниц — в потоки (asyncio.to_thread).
+"""
+
+import time
+import asyncio
+import logging
+from urllib.parse import urlparse
+
+import httpx
+
+from tools import resources, cpu_executor
+from tools.cache.page_cache import get_page_cache, conditional_headers
+from tools.parsers.article_parser import HEADERS, FETCH_MAX_WORKERS, FETCH_PER_HOST_LIMIT, FETCH_BATCH_DEADLINE
+from tools.metrics import timed
+
+
+def make_async_client(timeout: float = 10.0) -> httpx.AsyncClient:
+    """Клиент с пулом соединений; один на процесс/приложение, закрывается владельцем."""
+    # Accept-Encoding httpx выставляет сам — по установленным декодерам
+    headers = {k: v for k, v in HEADERS.items() if k != "Accept-Encoding"}
+    headers["User-Agent"] = resources.get("user_agent")
+    return httpx.AsyncClient(
+        headers=headers,
+        timeout=timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=128, max_keepalive_connections=32)
+    )
+
+
+async def _parse(html: str) -> str:
+    with timed("parse", log=False):
+        return (await cpu_executor.aparse_html(html)).strip()
+
+
+async def load_page_async(client: httpx.AsyncClient, url: str, host_limit: asyncio.Semaphore) -> str:
+    """Текст страницы по URL (пустая строка при ошибке); запись кэша как у _load_page."""
+    cache = get_page_cache()
+    entry = await asyncio.to_thread(cache.lookup, url)
+    if entry is not None and not entry.expired:
+        page = entry.value
+    else:
+        extra_headers = conditional_headers(entry.value) if entry is not None else {}
+        try:
+            async with host_limit:
+                response = await client.get(url, headers=extra_headers)
+            if response.status_code == 304 and entry is not None:
+                await asyncio.to_thread(cache.touch, url)
+                page = entry.value
+            else:
+                response.raise_for_status()
+                page = {
+                    "html": response.text,
+                    "text": None,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                }
+        except Exception as e:
+            logging.warning(f"[async_fetch] Ошибка при запросе {url}: {e}")
+            return ""
+
+    if page.get("text") is None:
+        page["text"] = await _parse(page["html"])
+        await asyncio.to_thread(cache.set, url, page)
+    return page["text"]
+
+
+async def fetch_text_batch_async(client: httpx.AsyncClient, urls: list[str],
+                                 deadline: float = FETCH_BATCH_DEADLINE,
+                                 max_concurrency: int = FETCH_MAX_WORKERS) -> dict[str, str]:
+    """
+    Асинхронный аналог fetch_text_batch: {url: текст} для страниц, успевших до дедлайна,
+    в порядке выдачи. Лимит на хост действует в пределах пачки.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    if not urls:
+        return {}
+
+    started = time.monotonic()
+    limit = asyncio.Semaphore(max_concurrency)
+    host_limits: dict[str, asyncio.Semaphore] = {}
+
+    async def fetch(url: str) -> str:
+        host = urlparse(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(FETCH_PER_HOST_LIMIT))
+        async with limit:
+            return await load_page_async(client, url, host_limit)
+
+    tasks = {asyncio.create_task(fetch(url)): url for url in urls}
+    done, not_done = await asyncio.wait(tasks, timeout=deadline)
+    for task in not_done:
+        task.cancel()
+
+    pages = {}
+    for task in done:
+        if task.exception() is not None:
+            logging.warning(f"[async_fetch] Ошибка при обработке URL {tasks[task]}: {task.exception()}")
+        elif task.result():
+            pages[tasks[task]] = task.result()
+
+    if not_done:
+        logging.warning(f"[async_fetch] Не уложились в {deadline} с: пропущено {len(not_done)} из {len(urls)} URL")
+    logging.info(f"[async_fetch] Загружено {len(pages)}/{len(urls)} страниц за {time.monotonic() - started:.1f} с")
+    return {url: pages[url] for url in urls if url in pages}
@@ -0,0 +1,152 @@
+# tools/parsers/fast_extractor.py
+
+"""
+Быстрое извлечение текста статьи за один потоковый проход lxml (parser target):
+дерево документа не строится, поддеревья nav/script/footer и т.п. пропускаются
+сразу при открытии тега, а вложенные блоки (p внутри li, blockquote или ячейки
+таблицы) не дают повторного текста — текст уходит только во внешний блок.
+Формат результата совпадает с parse_article_content.
+"""
+
+from lxml import etree
+
+# Поддеревья, которые пропускаем целиком
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "svg", "iframe",
+    "nav", "header", "footer", "aside", "form", "button", "select", "head"
+}
+
+# Блоки, текст которых попадает в результат
+BLOCK_PREFIXES = {
+    "p": "",
+    "li": "• ",
+    "blockquote": "Цитата: "
+}
+
+# Ячейки строки таблицы
+CELL_TAGS = {"td", "th"}
+
+# Вложенные теги, на границах которых слова разделяются пробелом. Строчные теги
+# (a, b, i, em, strong, span, sub, sup, wbr...) слова не разрывают: «H<sub>2</sub>O» — «H2O»
+SEPARATOR_TAGS = {
+    "br", "hr", "p", "div", "li", "ul", "ol", "dl", "dt", "dd", "blockquote", "pre",
+    "h1", "h2", "h3", "h4", "h5", "h6", "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+    "section", "article", "main", "figure", "figcaption", "address", "details", "summary"
+}
+
+_SKIP, _BLOCK, _TABLE, _ROW, _CELL, _PLAIN, _SEPARATOR = range(7)
+
+
+class _ArticleTarget:
+    def __init__(self):
+        self.parts = []
+        self.stack = []
+        self.skip_depth = 0
+        self.block = None      # (префикс, [фрагменты текста]) открытого блока
+        self.table_depth = 0
+        self.row = None        # ячейки текущей строки таблицы
+        self.cell = None       # фрагменты текущей ячейки
+
+    def start(self, tag, attrib):
+        tag = tag.lower() if isinstance(tag, str) else ""
+
+        if self.skip_depth or tag in SKIP_TAGS or attrib.get("role") == "navigation":
+            self.skip_depth += 1
+            self.stack.append(_SKIP)
+            return
+
+        if self.block is not None:
+            # Всё вложенное в блок — часть его текста
+            self.stack.append(self._nested(tag, self.block[1]))
+            return
+
+        if tag == "table":
+            self.table_depth += 1
+            self.stack.append(_TABLE)
+            return
+
+        if self.table_depth:
+            if self.table_depth == 1 and tag == "tr" and self.row is None:
+                self.row = []
+                self.stack.append(_ROW)
+                return
+            if self.table_depth == 1 and tag in CELL_TAGS and self.row is not None and self.cell is None:
+                self.cell = []
+                self.stack.append(_CELL)
+                return
+            self.stack.append(self._nested(tag, self.cell))
+            return
+
+        if tag in BLOCK_PREFIXES:
+            self.block = (BLOCK_PREFIXES[tag], [])
+            self.stack.append(_BLOCK)
+            return
+
+        self.stack.append(_PLAIN)
+
+    @staticmethod
+    def _nested(tag: str, fragments: list[str] | None) -> int:
+        if fragments is not None and tag in SEPARATOR_TAGS:
+            fragments.append(" ")
+            return _SEPARATOR
+        return _PLAIN
+
+    def end(self, tag):
+        if not self.stack:
+            return
+        kind = self.stack.pop()
+
+        if kind == _SEPARATOR:
+            fragments = self.block[1] if self.block is not None else self.cell
+            if fragments is not None:
+                fragments.append(" ")
+        elif kind == _SKIP:
+            self.skip_depth -= 1
+        elif kind == _BLOCK:
+            prefix, fragments = self.block
+            self.block = None
+            text = _normalize(fragments)
+            if text:
+                self.parts.append(f"{prefix}{text}")
+        elif kind == _TABLE:
+            self.table_depth -= 1
+        elif kind == _ROW:
+            cols = self.row
+            self.row = None
+            if cols:
+                self.parts.append(" | ".join(cols))
+        elif kind == _CELL:
+            text = _normalize(self.cell)
+            self.cell = None
+            self.row.append(text)
+
+    def data(self, data):
+        if self.skip_depth:
+            return
+        if self.block is not None:
+            self.block[1].append(data)
+        elif self.cell is not None:
+            self.cell.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return self.parts
+
+
+def _normalize(fragments: list[str]) -> str:
+    return " ".join("".join(fragments).split())
+
+
+def extract_text(html: str) -> str:
+    """
+    Извлекает абзацы, пункты списков, цитаты и строки таблиц в порядке документа.
+    """
+    if not html:
+        return ""
+
+    parser = etree.HTMLParser(target=_ArticleTarget(), remove_comments=True)
+    parser.feed(html)
+    parts = parser.close()
+    return "\n\n".join(parts)
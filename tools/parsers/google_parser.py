@@ -1,52 +1,93 @@
 import os
+import logging
 import requests
 import xml.etree.ElementTree as ET
 from dotenv import load_dotenv
 
+from tools.cache.serp_cache import cached_search, acached_search
+
 load_dotenv()  # Загружаем переменные из .env
 
+DEFAULT_XMLRIVER_URL = "https://xmlriver.com/search/xml"
+
 
-def parse_google_results(query: str, limit: int = 6) -> list[dict]:
+def parse_google_results(query: str, limit: int = 6, use_cache: bool = True) -> list[dict]:
     """
     Делает запрос к XMLriver API и возвращает список словарей:
     { "title": заголовок, "url": ссылка }
 
     :param query: Поисковый запрос
     :param limit: Сколько первых результатов отдать
+    :param use_cache: брать выдачу из кэша (tools/cache/serp_cache.py), если она свежая
     :return: список результатов
     """
+    if use_cache:
+        return cached_search(query, limit, _query_xmlriver)
+    return _query_xmlriver(query, limit)
+
+
+def _xmlriver_request(query: str) -> tuple[str, dict]:
     user = os.getenv("XMLRIVER_USER")
     key = os.getenv("XMLRIVER_KEY")
+    # Адрес API можно переопределить (например, локальная заглушка из benchmarks/fake_web.py)
+    url = os.getenv("XMLRIVER_URL", DEFAULT_XMLRIVER_URL)
 
     if not user or not key:
         raise ValueError("Не заданы XMLRIVER_USER или XMLRIVER_KEY в .env")
 
-    url = f"https://xmlriver.com/search/xml?user={user}&key={key}&query={query}"
+    return url, {"user": user, "key": key, "query": query}
 
-    try:
-        response = requests.get(url)
-        print(response)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
 
-        results = []
-        for item in root.findall(".//result"):
+def _parse_xmlriver_response(content: bytes, limit: int) -> list[dict]:
+    root = ET.fromstring(content)
+
+    results = []
+    for item in root.findall(".//result"):
+
+        title = item.findtext("title", "").strip()
+        link = item.findtext("url", "").strip()
+
+        if title and link:
+            results.append({
+                "title": title,
+                "url": link
+            })
 
-            title = item.findtext("title", "").strip()
-            link = item.findtext("url", "").strip()
-            print(link)
+        if len(results) >= limit:
+            break
 
-            if title and link:
-                results.append({
-                    "title": title,
-                    "url": link
-                })
+    return results
 
-            if len(results) >= limit:
-                break
 
-        return results
+def _query_xmlriver(query: str, limit: int) -> list[dict]:
+    url, params = _xmlriver_request(query)
+
+    try:
+        response = requests.get(url, params=params)
+        logging.debug(f"[XMLriver] Ответ: {response.status_code}")
+        response.raise_for_status()
+        return _parse_xmlriver_response(response.content, limit)
 
     except Exception as e:
-        print(f"[XMLriver] Ошибка при запросе: {e}")
+        logging.warning(f"[XMLriver] Ошибка при запросе: {e}")
         return []
+
+
+async def parse_google_results_async(query: str, client, limit: int = 6, use_cache: bool = True) -> list[dict]:
+    """
+    Асинхронная версия parse_google_results через httpx.AsyncClient (services/async_pipeline.py).
+    Кэш выдачи и склейка одинаковых запросов — как у синхронной версии.
+    """
+    async def search(query: str, limit: int) -> list[dict]:
+        url, params = _xmlriver_request(query)
+        try:
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            return _parse_xmlriver_response(response.content, limit)
+        except Exception as e:
+            logging.warning(f"[XMLriver] Ошибка при запросе: {e}")
+            return []
+
+    if use_cache:
+        return await acached_search(query, limit, search)
+    return await search(query, limit)
@@ -0,0 +1,190 @@
+# tools/rate_limiter.py
+
+"""
+Общий на процесс лимитер запросов к OpenAI: два token bucket'а —
+запросы в минуту (RPM) и токены в минуту (TPM).
+Ожидающие вызовы обслуживаются по приоритету: интерактивные задачи (веб)
+раньше пакетных (services/batch_runner.py). При 429 весь процесс делает паузу
+на Retry-After, чтобы не добивать квоту параллельными запросами.
+
+Бакеты — в памяти процесса, а OPENAI_RPM/OPENAI_TPM — лимиты всего ключа API.
+Поэтому каждый процесс получает долю 1/OPENAI_LIMIT_PROCESSES. Это число — сколько
+процессов одновременно ходят в OpenAI с этим ключом: воркеры gunicorn
+(gunicorn.conf.py выставляет его равным workers), плюс asgi.py и batch_runner,
+если они запущены рядом, — тогда задайте его вручную.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import random
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+INTERACTIVE = 0
+BATCH = 10
+
+# Лимиты ключа API и число процессов, между которыми они делятся поровну
+OPENAI_LIMIT_PROCESSES = max(1, int(os.getenv("OPENAI_LIMIT_PROCESSES", "1")))
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "500")) / OPENAI_LIMIT_PROCESSES
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "40000")) / OPENAI_LIMIT_PROCESSES
+
+# Как часто асинхронный вызов перепроверяет очередь, с
+ASYNC_POLL_INTERVAL = 0.05
+
+RETRY_ATTEMPTS = 6
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+_priority = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def llm_priority(level: int):
+    """Приоритет LLM-вызовов в текущем контексте (меньше — раньше)."""
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class RateLimiter:
+    def __init__(self, rpm: float = OPENAI_RPM, tpm: float = OPENAI_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.cond = threading.Condition()
+        self.waiters = []
+        self.counter = itertools.count()
+
+    def _enqueue(self, priority: int | None) -> tuple:
+        entry = (current_priority() if priority is None else priority, next(self.counter))
+        with self.cond:
+            heapq.heappush(self.waiters, entry)
+        return entry
+
+    def _dequeue(self, entry: tuple):
+        with self.cond:
+            self.waiters.remove(entry)
+            heapq.heapify(self.waiters)
+            self.cond.notify_all()
+
+    def _try_take(self, entry: tuple, tokens: int) -> float | None:
+        """
+        Под self.cond: списывает квоту, если entry первый в очереди и квоты хватает (→ 0).
+        Иначе — сколько ждать до следующей попытки (None — ждать, пока очередь сдвинется).
+        """
+        if self.waiters[0] != entry:
+            return None
+        now = time.monotonic()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        delay = max(self.paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+        if delay <= 0:
+            self.requests.level -= 1
+            self.tokens.level -= min(tokens, self.tokens.capacity)
+            return 0.0
+        return delay
+
+    def acquire(self, tokens: int, priority: int | None = None):
+        """
+        Блокирует, пока не освободится квота на один запрос и tokens токенов.
+        Первым квоту получает ожидающий с наименьшим priority (при равенстве — кто раньше пришёл).
+        """
+        entry = self._enqueue(priority)
+        try:
+            with self.cond:
+                while True:
+                    delay = self._try_take(entry, tokens)
+                    if delay == 0:
+                        return
+                    self.cond.wait(delay)
+        finally:
+            self._dequeue(entry)
+
+    async def aacquire(self, tokens: int, priority: int | None = None):
+        """
+        Асинхронная версия acquire: ждёт в event loop, не занимая поток.
+        Очередь и приоритеты общие с синхронными вызовами.
+        """
+        entry = self._enqueue(priority)
+        try:
+            while True:
+                with self.cond:
+                    delay = self._try_take(entry, tokens)
+                if delay == 0:
+                    return
+                await asyncio.sleep(ASYNC_POLL_INTERVAL if delay is None else min(delay, ASYNC_POLL_INTERVAL * 10))
+        finally:
+            self._dequeue(entry)
+
+    def adjust(self, tokens_delta: int):
+        """Коррекция после ответа: разница между фактическим расходом токенов и оценкой."""
+        with self.cond:
+            self.tokens.level -= tokens_delta
+            self.cond.notify_all()
+
+    def pause(self, seconds: float):
+        """Пауза для всех вызовов процесса (например, по Retry-After)."""
+        with self.cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.cond.notify_all()
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
+
+
+def retry_after_seconds(error: Exception) -> float | None:
+    """Значение Retry-After (или retry-after-ms) из ответа OpenAI, если оно есть."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt: int, error: Exception | None = None) -> float:
+    """Экспоненциальная задержка с jitter; Retry-After от сервера имеет приоритет."""
+    retry_after = retry_after_seconds(error) if error is not None else None
+    if retry_after is not None:
+        return retry_after + random.uniform(0, 1)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
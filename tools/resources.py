@@ -0,0 +1,58 @@
+# tools/resources.py
+
+"""
+Реестр «тяжёлых» ресурсов процесса: модель spaCy, база User-Agent, LLM-клиенты.
+Ресурс создаётся при первом обращении и дальше переиспользуется всеми потоками.
+preload() позволяет загрузить всё заранее — например, в мастер-процессе gunicorn
+до fork, чтобы воркеры разделяли память по copy-on-write.
+"""
+
+import logging
+import threading
+from typing import Any, Callable
+
+_factories: dict[str, Callable[[], Any]] = {}
+_instances: dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def register(name: str, factory: Callable[[], Any]):
+    """Регистрирует фабрику ресурса. Сам ресурс не создаётся."""
+    with _lock:
+        _factories[name] = factory
+
+
+def get(name: str) -> Any:
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        if name not in _instances:
+            if name not in _factories:
+                raise KeyError(f"Ресурс '{name}' не зарегистрирован")
+            logging.info(f"[resources] Загрузка ресурса '{name}'")
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    """Ленивый ресурс без предварительной регистрации (например, LLM-клиент с заданными параметрами)."""
+    instance = _instances.get(name)
+    if instance is not None:
+        return instance
+
+    with _lock:
+        if name not in _factories:
+            _factories[name] = factory
+    return get(name)
+
+
+def is_loaded(name: str) -> bool:
+    return name in _instances
+
+
+def preload(*names: str):
+    """Загружает перечисленные ресурсы (или все зарегистрированные)."""
+    for name in names or list(_factories):
+        get(name)
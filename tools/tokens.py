@@ -0,0 +1,72 @@
+# tools/tokens.py
+
+"""
+Подсчёт токенов и нарезка текста по бюджету токенов (tiktoken).
+"""
+
+import functools
+
+import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model_name: str = "gpt-4"):
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+def count_tokens(text: str, model_name: str = "gpt-4") -> int:
+    return len(get_encoding(model_name).encode(text, disallowed_special=()))
+
+
+def chunk_by_tokens(texts: list[str], chunk_tokens: int, max_total_tokens: int | None = None,
+                    model_name: str = "gpt-4", separator: str = "\n\n") -> list[str]:
+    """
+    Склеивает абзацы из texts в куски не длиннее chunk_tokens токенов.
+    Абзац длиннее бюджета режется по токенам. Всё, что не помещается
+    в max_total_tokens, отбрасывается.
+
+    :return: список кусков в исходном порядке
+    """
+    encoding = get_encoding(model_name)
+    sep_tokens = len(encoding.encode(separator))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    total = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append(separator.join(current))
+        current = []
+        current_tokens = 0
+
+    for text in texts:
+        for paragraph in text.split(separator):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+
+            tokens = encoding.encode(paragraph, disallowed_special=())
+            pieces = [tokens[i:i + chunk_tokens] for i in range(0, len(tokens), chunk_tokens)]
+
+            for piece in pieces:
+                cost = len(piece) + (sep_tokens if current else 0)
+                if max_total_tokens is not None and total + cost > max_total_tokens:
+                    flush()
+                    return chunks
+                if current_tokens + cost > chunk_tokens:
+                    flush()
+                    cost = len(piece)
+                current.append(paragraph if len(pieces) == 1 else encoding.decode(piece))
+                current_tokens += cost
+                total += cost
+
+    flush()
+    return chunks